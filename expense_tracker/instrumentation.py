@@ -0,0 +1,228 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware measures wall time, database queries and time, time
+spent in serializers and the response size of every request. It reports
+them in a ``Server-Timing`` header and in Prometheus histograms labelled
+by view (``/metrics``), and logs requests slower than
+``SLOW_REQUEST_THRESHOLD_MS``.
+
+Histograms live in process memory; with several web workers each one is
+scraped as its own target.
+"""
+import bisect
+import hmac
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger('expense_tracker.performance')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self._serializing = False
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection.
+
+    It charges the query to the request in the current context, which the
+    async ORM's worker threads inherit.
+    """
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - start
+        stats.queries += 1
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+@contextmanager
+def serialization_timer():
+    """
+    Count the enclosed block as serializer time of the current request.
+
+    Queries run inside the block (lazy querysets) stay database time.
+    Nested timers count once.
+    """
+    stats = _current.get()
+    if stats is None or stats._serializing:
+        yield
+        return
+    stats._serializing = True
+    start, db_before = time.perf_counter(), stats.db_time
+    try:
+        yield
+    finally:
+        stats._serializing = False
+        stats.serialize_time += (
+            time.perf_counter() - start - (stats.db_time - db_before)
+        )
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            counts, total = self.series.get(labels, ([0] * (len(self.buckets) + 1), 0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.series[labels] = (counts, total + value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = sorted((labels, list(counts), total)
+                            for labels, (counts, total) in self.series.items())
+        for labels, counts, total in series:
+            label_text = ','.join(f'{key}="{value}"' for key, value in labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{label_text}}} {cumulative}')
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Wall time per request.', DURATION_BUCKETS)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request.', QUERY_BUCKETS)
+DB_DURATION = Histogram(
+    'http_request_db_duration_seconds', 'Database time per request.', DURATION_BUCKETS)
+SERIALIZE_DURATION = Histogram(
+    'http_request_serialize_duration_seconds', 'Serializer time per request.', DURATION_BUCKETS)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Response body size (non-streaming).', SIZE_BUCKETS)
+HISTOGRAMS = (REQUEST_DURATION, DB_QUERIES, DB_DURATION, SERIALIZE_DURATION, RESPONSE_SIZE)
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match._func_path
+
+
+class PerformanceMiddleware:
+    """
+    Measures each request; keep it first in MIDDLEWARE so it sees them all.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        # Connections opened before the middleware loaded.
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, stats, elapsed):
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries"',
+            f'serialize;dur={stats.serialize_time * 1000:.2f}',
+            f'total;dur={elapsed * 1000:.2f}',
+        ))
+
+        labels = (
+            ('view', view_label(request)),
+            ('method', request.method),
+            ('status', str(response.status_code)),
+        )
+        REQUEST_DURATION.observe(labels, elapsed)
+        DB_QUERIES.observe(labels, stats.queries)
+        DB_DURATION.observe(labels, stats.db_time)
+        SERIALIZE_DURATION.observe(labels, stats.serialize_time)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(labels, len(response.content))
+
+        if elapsed * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            logger.warning(
+                'Slow request %s %s (%s) %s: %.0f ms, %d queries in %.0f ms, '
+                'serialize %.0f ms',
+                request.method, request.path, labels[0][1], response.status_code,
+                elapsed * 1000, stats.queries, stats.db_time * 1000,
+                stats.serialize_time * 1000,
+            )
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition of the request histograms.
+
+    When METRICS_TOKEN is set, scrapers must send it as a bearer token.
+    """
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponseForbidden()
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return HttpResponse(
+        '\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
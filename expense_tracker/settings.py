@@ -53,9 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'expense_tracker.instrumentation.PerformanceMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'expense_tracker.staticfiles.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -87,15 +88,56 @@ WSGI_APPLICATION = 'expense_tracker.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Under ASGI every request runs its ORM calls on a fresh thread, so
+# persistent connections would pile up; set DB_CONN_MAX_AGE=0 there.
 DATABASES = {
     'default': dj_database_url.parse(
         DATABASE_URL,
-        conn_max_age=600
+        conn_max_age=config('DB_CONN_MAX_AGE', default=600, cast=int)
     )
 }
 
 AUTH_USER_MODEL = 'users.CustomUser'
 
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Redis when REDIS_URL is set (docker-compose provides one); otherwise a
+# per-process in-memory cache, which is what the test suite runs against.
+# The 'tokens' cache holds the refresh-token blacklist (users.tokens). It
+# is kept apart so clearing or culling response caches never forgets a
+# revocation; point it at its own Redis database, as clear() flushes one.
+
+REDIS_URL = config('REDIS_URL', default='')
+TOKEN_BLACKLIST_REDIS_URL = config('TOKEN_BLACKLIST_REDIS_URL', default=REDIS_URL)
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'tokens': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': TOKEN_BLACKLIST_REDIS_URL,
+            'KEY_PREFIX': 'tokens',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'tokens': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'tokens',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        },
+    }
+
+# Seconds a cached read response (summary, list pages, ...) is kept.
+EXPENSE_RESPONSE_CACHE_TIMEOUT = config('EXPENSE_RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -116,7 +158,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
@@ -154,14 +196,53 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=5),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 
-    "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.CustomTokenObtainPairSerializer",
-    "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.CustomTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.RotatingTokenRefreshSerializer",
     "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
-    "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
+    "TOKEN_BLACKLIST_SERIALIZER": "users.serializers.LogoutSerializer",
     "SLIDING_TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer",
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
 }
 
+# Expense charts are rendered in a separate process pool per web worker.
+CHART_RENDER_WORKERS = config('CHART_RENDER_WORKERS', default=1, cast=int)
+
+# Batch endpoint limits: items per request and rows per INSERT/UPDATE.
+EXPENSE_BULK_MAX_ITEMS = config('EXPENSE_BULK_MAX_ITEMS', default=10000, cast=int)
+EXPENSE_BULK_BATCH_SIZE = config('EXPENSE_BULK_BATCH_SIZE', default=500, cast=int)
+
+# PostgreSQL only: migrate the expense table to monthly range partitions
+# (see expenses.partitions and the expense_partitions command).
+EXPENSE_PARTITIONING = config('EXPENSE_PARTITIONING', default=False, cast=bool)
+
+# Sync endpoint: changes younger than the settle window wait for the next
+# sync (covers transactions still committing); tombstones of deleted
+# expenses are kept this long.
+EXPENSE_SYNC_SETTLE_SECONDS = config('EXPENSE_SYNC_SETTLE_SECONDS', default=5, cast=int)
+EXPENSE_TOMBSTONE_RETENTION_DAYS = config('EXPENSE_TOMBSTONE_RETENTION_DAYS', default=90, cast=int)
+
+# Request instrumentation: requests slower than this are logged, and
+# /metrics requires this bearer token when it is set.
+SLOW_REQUEST_THRESHOLD_MS = config('SLOW_REQUEST_THRESHOLD_MS', default=1000, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+CORS_EXPOSE_HEADERS = ['Server-Timing']
+
+
+# Password hashes run in a per-process thread pool of this many workers;
+# beyond PASSWORD_HASH_QUEUE waiting hashes, signup and login answer 429.
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=2, cast=int)
+PASSWORD_HASH_QUEUE = config('PASSWORD_HASH_QUEUE', default=4, cast=int)
+# PBKDF2 cost (Django 5.2's default). Stored hashes are re-hashed at the
+# current cost on the next login.
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=1_000_000, cast=int)
+PASSWORD_HASHERS = [
+    'users.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
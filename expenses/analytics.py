@@ -0,0 +1,108 @@
+"""
+Cross-user spending analytics for admins, served from precomputed tables.
+
+Both summaries are built from ExpenseRollup, which already holds one row
+per user, month and category, so neither a refresh nor a dashboard read
+touches expenses_expense. On PostgreSQL they are materialized views
+refreshed CONCURRENTLY (readers keep the old contents until the new ones
+commit); elsewhere they are plain tables rebuilt in one transaction.
+
+Nothing refreshes them on writes. Run the refresh_expense_analytics
+command on a schedule; every response reports when the data was built.
+"""
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import ExpenseRollup, MonthlySpend, UserMonthlySpend
+
+REFRESHED_AT_KEY = 'expenses:analytics:refreshed-at'
+
+ROLLUPS = ExpenseRollup._meta.db_table
+
+# Summary table -> (columns, query), as created by migration 0009. Empty
+# rollups are left behind by deletes; they are not activity.
+SUMMARIES = {
+    MonthlySpend._meta.db_table: (
+        ['month', 'category', 'total', 'expense_count', 'active_users'],
+        f"""
+        SELECT month, category, SUM(total), SUM(count), COUNT(DISTINCT user_id)
+        FROM {ROLLUPS} WHERE count > 0 GROUP BY month, category
+        """,
+    ),
+    UserMonthlySpend._meta.db_table: (
+        ['month', 'user_id', 'total', 'expense_count'],
+        f"""
+        SELECT month, user_id, SUM(total), SUM(count)
+        FROM {ROLLUPS} WHERE count > 0 GROUP BY month, user_id
+        """,
+    ),
+}
+
+
+def refresh():
+    """
+    Rebuild the summaries from the rollups; returns the refresh time.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for table in SUMMARIES:
+                cursor.execute(f'REFRESH MATERIALIZED VIEW CONCURRENTLY {table}')
+        else:
+            with transaction.atomic():
+                for table, (columns, select) in SUMMARIES.items():
+                    cursor.execute(f'DELETE FROM {table}')
+                    cursor.execute(f'INSERT INTO {table} ({", ".join(columns)}) {select}')
+    refreshed_at = timezone.now()
+    cache.set(REFRESHED_AT_KEY, refreshed_at, None)
+    return refreshed_at
+
+
+def refreshed_at():
+    """
+    When the summaries were last refreshed, or None if not known.
+    """
+    return cache.get(REFRESHED_AT_KEY)
+
+
+def _in_range(queryset, start=None, end=None):
+    if start:
+        queryset = queryset.filter(month__gte=start)
+    if end:
+        queryset = queryset.filter(month__lte=end)
+    return queryset
+
+
+def spending(start=None, end=None, category=None):
+    """
+    Total, expense count and active users per month and category.
+    """
+    queryset = _in_range(MonthlySpend.objects.all(), start, end)
+    if category:
+        queryset = queryset.filter(category=category)
+    return list(queryset.values('month', 'category', 'total', 'expense_count', 'active_users'))
+
+
+def active_users(start=None, end=None):
+    """
+    Users with at least one expense, per month.
+    """
+    return list(
+        _in_range(UserMonthlySpend.objects.all(), start, end)
+        .values('month')
+        .annotate(active_users=Count('user'))
+        .order_by('month')
+    )
+
+
+def top_spenders(start=None, end=None, limit=10):
+    """
+    The ``limit`` users who spent the most over the range.
+    """
+    return list(
+        _in_range(UserMonthlySpend.objects.all(), start, end)
+        .values('user', 'user__email', 'user__name')
+        .annotate(total=Sum('total'), expense_count=Sum('expense_count'))
+        .order_by('-total', 'user')[:limit]
+    )
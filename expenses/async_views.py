@@ -0,0 +1,174 @@
+"""
+Async (ASGI) variants of the read-heavy expense endpoints.
+
+DRF views are synchronous, so these are plain Django async views that
+reuse the same filters, pagination, serializers, cache entries and
+renderer, and return the same bodies as their ExpenseViewSet and
+ExpenseReportView counterparts. Served under uvicorn, a request waiting
+on the database no longer holds a worker.
+"""
+from functools import wraps
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Avg, Count, Sum
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from django_filters import utils
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from users.authentication import ClaimsJWTAuthentication
+from users.permissions import IsUser
+
+from . import rollups
+from .caching import acached_response, arecord_cache_result
+from .filters import ExpenseFilter
+from .models import Expense
+from .pagination import ExpenseCursorPagination
+from .renderers import PNGRenderer, SVGRenderer
+from .reports import arequest_spending_chart, aspending_series, chart_options, encode_chart
+from .serializers import ExpenseFastSerializer
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        JSONRenderer().render(data), status=status,
+        content_type='application/json', headers=headers,
+    )
+
+
+def async_api_view(permission_class=IsUser):
+    """
+    Authenticate with the async claims JWT check and enforce
+    ``permission_class`` (only its synchronous, I/O-free has_permission).
+
+    APIExceptions become JSON error responses shaped like DRF's.
+    """
+    def decorator(view):
+        @require_GET
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            authenticator = ClaimsJWTAuthentication()
+            try:
+                result = await authenticator.aauthenticate(request)
+                # Replaces AuthenticationMiddleware's lazy (sync) session user.
+                request.user = result[0] if result else AnonymousUser()
+                if not permission_class().has_permission(request, None):
+                    if result is None:
+                        raise exceptions.NotAuthenticated()
+                    raise exceptions.PermissionDenied()
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return error_response(exc, authenticator.authenticate_header(request))
+        return wrapper
+    return decorator
+
+
+def error_response(exc, auth_header):
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers['WWW-Authenticate'] = auth_header
+    return json_response(data, status=exc.status_code, headers=headers)
+
+
+def filtered(request):
+    """
+    ``(filterset, cleaned params)`` for the user's expenses.
+    """
+    queryset = Expense.objects.filter(user=request.user).only(*ExpenseFastSerializer.fields)
+    filterset = ExpenseFilter(request.GET, queryset=queryset, request=request)
+    if not filterset.is_valid():
+        raise utils.translate_validation(filterset.errors)
+    return filterset, filterset.form.cleaned_data
+
+
+def filtered_queryset(filterset):
+    try:
+        return filterset.qs
+    except DjangoValidationError as exc:
+        raise exceptions.ValidationError(exc.messages)
+
+
+async def cached(request, name, params, compute):
+    data, hit = await acached_response(request.user.pk, name, params, compute)
+    return json_response(data, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+
+
+@async_api_view()
+async def expense_list(request):
+    filterset, params = filtered(request)
+    drf_request = Request(request)
+    paginator = ExpenseCursorPagination()
+    params = dict(params)
+    params.update(
+        (key, request.GET.get(key))
+        for key in (paginator.cursor_query_param, paginator.page_size_query_param)
+    )
+    params['host'] = request.get_host()
+    params['path'] = request.path
+
+    async def compute():
+        queryset = filtered_queryset(filterset).values(*ExpenseFastSerializer.fields)
+        page = await paginator.apaginate_queryset(queryset, drf_request)
+        return paginator.get_paginated_response(ExpenseFastSerializer(page).data).data
+
+    return await cached(request, 'list', params, compute)
+
+
+@async_api_view()
+async def expense_summary(request):
+    filterset, params = filtered(request)
+
+    async def compute():
+        stats = await rollups.asummarize(request.user, params)
+        if stats is None:
+            stats = await filtered_queryset(filterset).aaggregate(
+                total=Sum('amount'),
+                average=Avg('amount'),
+                count=Count('id'),
+            )
+        return {
+            'total_expenses': stats['total'] or 0,
+            'average_expense': stats['average'] or 0,
+            'transaction_count': stats['count'] or 0,
+        }
+
+    return await cached(request, 'summary', params, compute)
+
+
+CHART_IMAGE_TYPES = {'png': PNGRenderer.media_type, 'svg': SVGRenderer.media_type}
+
+
+@async_api_view()
+async def spending_chart(request):
+    """
+    The ``?format=`` json (default), png, svg and data representations,
+    ``width``/``height``/``dpi`` and caching of the sync spending_chart.
+    Only ``?format=`` picks the representation; the Accept header is not
+    negotiated.
+    """
+    fmt = request.GET.get('format', 'json')
+    if fmt == 'data':
+        async def compute():
+            return {'results': await aspending_series(request.user)}
+        return await cached(request, 'spending_chart_data', {}, compute)
+    if fmt != 'json' and fmt not in CHART_IMAGE_TYPES:
+        raise exceptions.NotFound()
+
+    render_fmt, options = chart_options(fmt, request.GET)
+    ready, chart = await arequest_spending_chart(request.user, fmt=render_fmt, **options)
+    await arecord_cache_result('spending_chart', ready)
+    if not ready:
+        return json_response(
+            {'status': 'pending', 'poll_url': request.build_absolute_uri()},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Retry-After': '1', 'X-Cache': 'MISS'},
+        )
+    if fmt in CHART_IMAGE_TYPES:
+        if chart is None:
+            return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+        return HttpResponse(chart, content_type=CHART_IMAGE_TYPES[fmt], headers={'X-Cache': 'HIT'})
+    return json_response({'chart': encode_chart(chart)}, headers={'X-Cache': 'HIT'})
@@ -0,0 +1,278 @@
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+SEED_PASSWORD = 'BenchPass123!'
+SIGNUP_EMAIL_PREFIX = 'bench-signup-'
+CHART_READY_TIMEOUT = 30
+
+# What a web worker imports before serving its first request.
+STARTUP_CODE = (
+    'import django; django.setup(); '
+    'import expense_tracker.urls, expense_tracker.asgi, expense_tracker.wsgi'
+)
+
+ENDPOINTS = ('list', 'list_filtered', 'summary', 'spending_chart', 'signup', 'login')
+# Metrics compared against a baseline with the absolute growth always
+# tolerated as noise; None means the value must not grow at all.
+COMPARED_METRICS = {'p50_ms': 1.0, 'p95_ms': 2.0, 'queries': None, 'peak_kib': 16}
+
+
+def seed_email(prefix, index):
+    return f'{prefix}-{index}@example.com'
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of a non-empty sample list.
+    """
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def measure(name, call, iterations, warmup=1, cold=False):
+    """
+    Time ``call`` and report latency percentiles, queries and peak memory.
+
+    Latency comes from ``iterations`` untraced calls. Query count and peak
+    Python allocation come from one extra call, since both debug cursors
+    and tracemalloc would skew the timings. With ``cold`` the cache is
+    cleared before every call.
+    """
+    for _ in range(warmup):
+        call()
+
+    timings = []
+    status = None
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+        start = time.perf_counter()
+        status = call()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    if cold:
+        cache.clear()
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'name': name,
+        'status': status,
+        'iterations': iterations,
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries': len(queries),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def compare_results(results, baseline, threshold=0.2):
+    """
+    Messages for every metric that regressed against ``baseline``.
+
+    Timings and memory may grow by ``threshold`` (a fraction) or by their
+    noise floor, whichever is larger; query counts must not grow at all.
+    """
+    previous = {row['name']: row for row in baseline}
+    regressions = []
+    for row in results:
+        base = previous.get(row['name'])
+        if base is None:
+            continue
+        for metric, noise in COMPARED_METRICS.items():
+            limit = base[metric]
+            if noise is not None:
+                limit = max(limit * (1 + threshold), limit + noise)
+            if row[metric] > limit:
+                regressions.append(
+                    f"{row['name']}: {metric} {row[metric]} > baseline {base[metric]}"
+                )
+    return regressions
+
+
+def api_client():
+    """
+    APIClient whose Host header passes ALLOWED_HOSTS outside the test runner.
+    """
+    host = next(
+        (h.lstrip('.') for h in settings.ALLOWED_HOSTS if h and h != '*'),
+        'localhost',
+    )
+    return APIClient(HTTP_HOST=host)
+
+
+def _drain(response):
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response.status_code
+
+
+def _wait_for_chart(client, url):
+    deadline = time.monotonic() + CHART_READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if client.get(url).status_code != 202:
+            return
+        time.sleep(0.2)
+
+
+def endpoint_calls(email, password=SEED_PASSWORD, names=ENDPOINTS):
+    """
+    ``(name, call)`` pairs for the benchmarked endpoints.
+
+    Each call issues one request through the full middleware, auth and
+    serializer stack as ``email`` and returns the status code.
+    """
+    client = api_client()
+    login = client.post(reverse('login'), {'email': email, 'password': password})
+    if login.status_code != 200:
+        raise ValueError(f'Cannot log in as {email}.')
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+
+    today = timezone.now().date()
+    filtered = {
+        'category': 'GROCERIES',
+        'start_date': (today - timedelta(days=90)).isoformat(),
+        'min_amount': '10',
+    }
+    chart_url = reverse('expense-reports-spending-chart')
+    signups = itertools.count()
+    run = uuid.uuid4().hex[:8]
+    anonymous = api_client()
+
+    calls = {
+        'list': lambda: _drain(client.get(reverse('expense-list'))),
+        'list_filtered': lambda: _drain(client.get(reverse('expense-list'), filtered)),
+        'summary': lambda: _drain(client.get(reverse('expense-summary'))),
+        'spending_chart': lambda: _drain(client.get(chart_url)),
+        'signup': lambda: _drain(anonymous.post(reverse('user-signup'), {
+            'email': f'{SIGNUP_EMAIL_PREFIX}{run}-{next(signups)}@example.com',
+            'name': 'Bench Signup',
+            'password': SEED_PASSWORD,
+        })),
+        'login': lambda: _drain(anonymous.post(reverse('login'), {
+            'email': email, 'password': password,
+        })),
+    }
+    if 'spending_chart' in names:
+        # Benchmark the served chart, not the 202s while it renders.
+        _wait_for_chart(client, chart_url)
+    return [(name, calls[name]) for name in names]
+
+
+async def asgi_get(app, path, query='', headers=()):
+    """
+    Issue one GET straight into an ASGI application; returns the status.
+    """
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    received = False
+    status = None
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client never disconnects; Django cancels this wait itself.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run_concurrent(call, concurrency, total):
+    """
+    Run ``total`` awaits of ``call()`` with at most ``concurrency`` in flight.
+
+    Returns throughput and latency percentiles over all calls.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    timings, statuses = [], set()
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            statuses.add(await call())
+            timings.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'statuses': sorted(statuses),
+        'rps': round(total / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+    }
+
+
+def best_within(rows, p99_ms):
+    """
+    The highest-throughput row whose p99 stays within ``p99_ms``, or None.
+    """
+    rows = [row for row in rows if row['p99_ms'] <= p99_ms]
+    return max(rows, key=lambda row: row['rps'], default=None)
+
+
+def import_times(code=STARTUP_CODE):
+    """
+    ``{module: (self_us, cumulative_us)}`` from ``python -X importtime``.
+
+    ``code`` runs in a fresh interpreter with the current environment, so
+    nothing this process already imported skews the numbers.
+    """
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'expense_tracker.settings')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        times[module.strip()] = (int(self_us), int(cumulative_us))
+    return times
@@ -0,0 +1,76 @@
+"""
+Budget status from the running monthly totals.
+
+Every expense write already adjusts the ExpenseRollup of its user, month
+and category with an F() increment, so that rollup is the budget's
+running spend. Checking a budget is a lookup of one rollup by its unique
+key, never a sum over expenses.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from .models import Budget, ExpenseRollup
+from .rollups import month_start
+
+
+def spending(user, month, categories=None):
+    """
+    ``{category: total}`` of ``user``'s rollups for ``month``.
+    """
+    qs = ExpenseRollup.objects.filter(user=user, month=month_start(month))
+    if categories is not None:
+        qs = qs.filter(category__in=categories)
+    return dict(qs.values_list('category', 'total'))
+
+
+def status(budget, month, spent, change=0):
+    """
+    Where ``budget`` stands for ``month`` after spending moved by ``change``.
+
+    ``crossed`` is set when that change took the spend over the limit.
+    """
+    spent = spent or Decimal('0')
+    exceeded = spent > budget.limit
+    return {
+        'category': budget.category,
+        'month': f'{month:%Y-%m}',
+        'limit': budget.limit,
+        'spent': spent,
+        'remaining': budget.limit - spent,
+        'exceeded': exceeded,
+        'crossed': exceeded and spent - change <= budget.limit,
+    }
+
+
+def write_statuses(user, added=(), removed=()):
+    """
+    Status of each budget an expense write touched, given as ExpenseRows.
+
+    Call inside the write's transaction, after the rollups were updated.
+    """
+    changes = defaultdict(Decimal)
+    for sign, rows in ((1, added), (-1, removed)):
+        for row in rows:
+            changes[(month_start(row.date), row.category)] += sign * Decimal(row.amount)
+    if not changes:
+        return []
+
+    budgets = {
+        budget.category: budget for budget in
+        Budget.objects.filter(user=user, category__in={category for _, category in changes})
+    }
+    keys = sorted(key for key in changes if key[1] in budgets)
+    if not keys:
+        return []
+    totals = {
+        (month, category): total for month, category, total in
+        ExpenseRollup.objects.filter(
+            user=user,
+            month__in={month for month, _ in keys},
+            category__in={category for _, category in keys},
+        ).values_list('month', 'category', 'total')
+    }
+    return [
+        status(budgets[category], month, totals.get((month, category)), changes[(month, category)])
+        for month, category in keys
+    ]
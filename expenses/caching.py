@@ -0,0 +1,135 @@
+import hashlib
+import json
+from decimal import Decimal
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(user_id):
+    return f'expenses:data-version:{user_id}'
+
+
+def data_version(user_id):
+    """
+    Opaque stamp that changes whenever the user's expenses change.
+    """
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def adata_version(user_id):
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid4().hex, timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_data_version(user_id):
+    """
+    Invalidate everything cached against the user's current data version.
+
+    The bump waits for commit so a concurrent reader cannot cache
+    pre-commit data under the new version.
+    """
+    transaction.on_commit(
+        lambda: cache.set(_version_key(user_id), uuid4().hex, timeout=None)
+    )
+
+
+def _metric_key(name, outcome):
+    return f'expenses:cache-metrics:{name}:{outcome}'
+
+
+def record_cache_result(name, hit):
+    """
+    Count a cache hit or miss for ``name`` across all workers.
+    """
+    key = _metric_key(name, 'hits' if hit else 'misses')
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); losing one sample is fine.
+        pass
+
+
+async def arecord_cache_result(name, hit):
+    key = _metric_key(name, 'hits' if hit else 'misses')
+    await cache.aadd(key, 0, timeout=None)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        pass
+
+
+def cache_metrics(names):
+    """
+    Returns ``{name: {'hits': n, 'misses': n}}`` for the given names.
+    """
+    keys = {
+        (name, outcome): _metric_key(name, outcome)
+        for name in names for outcome in ('hits', 'misses')
+    }
+    values = cache.get_many(keys.values())
+    metrics = {name: {'hits': 0, 'misses': 0} for name in names}
+    for (name, outcome), key in keys.items():
+        metrics[name][outcome] = values.get(key, 0)
+    return metrics
+
+
+def normalize_params(params):
+    """
+    Canonical, hashable form of query parameters; blanks are dropped.
+    """
+    items = sorted(
+        (key, str(value.normalize() if isinstance(value, Decimal) else value))
+        for key, value in params.items()
+        if value not in (None, '')
+    )
+    return hashlib.sha256(json.dumps(items).encode()).hexdigest()
+
+
+def _response_key(user_id, version, name, params):
+    return f'expenses:response:{user_id}:{version}:{name}:{normalize_params(params)}'
+
+
+def cached_response(user_id, name, params, compute):
+    """
+    Returns ``(data, hit)`` for a per-user read, computing it on a miss.
+
+    The key embeds the user's data version, so any write invalidates every
+    cached response for that user at once without enumerating keys.
+    """
+    key = _response_key(user_id, data_version(user_id), name, params)
+    data = cache.get(key)
+    hit = data is not None
+    if not hit:
+        data = compute()
+        cache.set(key, data, settings.EXPENSE_RESPONSE_CACHE_TIMEOUT)
+    record_cache_result(name, hit)
+    return data, hit
+
+
+async def acached_response(user_id, name, params, compute):
+    """
+    Async cached_response(); ``compute`` is a coroutine function.
+
+    Entries are shared with the sync views.
+    """
+    key = _response_key(user_id, await adata_version(user_id), name, params)
+    data = await cache.aget(key)
+    hit = data is not None
+    if not hit:
+        data = await compute()
+        await cache.aset(key, data, settings.EXPENSE_RESPONSE_CACHE_TIMEOUT)
+    await arecord_cache_result(name, hit)
+    return data, hit
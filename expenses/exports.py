@@ -0,0 +1,107 @@
+import csv
+import json
+
+from .serializers import ExpenseFastSerializer, format_amount, format_date
+
+EXPORT_FIELDS = ExpenseFastSerializer.fields
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """
+    File-like object whose write() hands the line back to the caller.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _formatted(row):
+    pk, amount, category, date, description = row
+    return pk, format_amount(amount), category, format_date(date), description
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields expense tuples in EXPORT_FIELDS order, formatted as the API does.
+
+    Rows come from a server-side cursor as plain tuples; no model instances
+    or serializers are built, so memory stays flat for any export size.
+    """
+    rows = (
+        queryset.order_by('-date', '-id')
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        yield _formatted(row)
+
+
+async def aexport_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Async export_rows(), fetching one chunk at a time.
+    """
+    # Plain values_list() runs its query as soon as aiterator() builds the
+    # sync iterator, on the event loop; values() defers it to the thread.
+    rows = (
+        queryset.order_by('-date', '-id')
+        .values(*EXPORT_FIELDS)
+        .aiterator(chunk_size=chunk_size)
+    )
+    async for row in rows:
+        yield _formatted(row.values())
+
+
+def _batched(lines, size):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+async def _abatched(lines, size):
+    batch = []
+    async for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def _ndjson_line(row):
+    return json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+
+def stream_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    lines = (writer.writerow(row) for row in export_rows(queryset, chunk_size))
+    yield writer.writerow(EXPORT_FIELDS)
+    yield from _batched(lines, chunk_size)
+
+
+def stream_ndjson(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    lines = (_ndjson_line(row) for row in export_rows(queryset, chunk_size))
+    yield from _batched(lines, chunk_size)
+
+
+# Under ASGI, Django drains a sync streaming iterator into a list before
+# sending anything; these async twins keep exports streamed there.
+
+async def astream_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    lines = (writer.writerow(row) async for row in aexport_rows(queryset, chunk_size))
+    yield writer.writerow(EXPORT_FIELDS)
+    async for batch in _abatched(lines, chunk_size):
+        yield batch
+
+
+async def astream_ndjson(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    lines = (_ndjson_line(row) async for row in aexport_rows(queryset, chunk_size))
+    async for batch in _abatched(lines, chunk_size):
+        yield batch
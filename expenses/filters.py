@@ -2,11 +2,13 @@ import django_filters
 from django.core.exceptions import ValidationError
 
 from .models import Expense
+from .search import filter_search
 
 
 class ExpenseFilter(django_filters.FilterSet):
     """
-    Filters for Expense list by date range, category, and amount range.
+    Filters for Expense list by date range, category, amount range and
+    description search.
     """
     start_date = django_filters.DateFilter(
         field_name='date', lookup_expr='gte', label='Start Date'
@@ -23,10 +25,14 @@ class ExpenseFilter(django_filters.FilterSet):
     max_amount = django_filters.NumberFilter(
         field_name='amount', lookup_expr='lte', label='Max Amount'
     )
+    q = django_filters.CharFilter(method='filter_q', label='Search')
 
     class Meta:
         model = Expense
-        fields = ['category', 'start_date', 'end_date', 'min_amount', 'max_amount']
+        fields = ['category', 'start_date', 'end_date', 'min_amount', 'max_amount', 'q']
+
+    def filter_q(self, queryset, name, value):
+        return filter_search(queryset, value)
 
     def filter_queryset(self, queryset):
         qs = super().filter_queryset(queryset)
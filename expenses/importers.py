@@ -0,0 +1,160 @@
+import csv
+import io
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Expense
+from .rollups import ExpenseRow
+from .serializers import (
+    AMOUNT_ERROR, CATEGORY_ERROR, FUTURE_DATE_ERROR, MAX_AMOUNT,
+    OLD_DATE_ERROR, VALID_CATEGORIES, allowed_date_range,
+)
+from .signals import expenses_changed
+
+IMPORT_BATCH_SIZE = 5000
+REQUIRED_COLUMNS = ('amount', 'category', 'date')
+COPY_COLUMNS = (
+    'user_id', 'amount', 'category', 'date', 'description',
+    'created_at', 'updated_at',
+)
+
+
+class ImportFormatError(Exception):
+    """
+    Raised when the CSV header lacks required columns.
+    """
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+
+
+def validate_batch(rows):
+    """
+    Applies ExpenseSerializer's field rules to a batch of CSV rows.
+
+    Bounds are computed once per batch. Returns ``(valid, rejects)``:
+    valid holds ``(amount, category, date, description)`` tuples and
+    rejects holds ``(line_number, errors)`` pairs.
+    """
+    oldest, today = allowed_date_range()
+    categories = set(VALID_CATEGORIES)
+    valid, rejects = [], []
+
+    for line, row in rows:
+        errors = {}
+
+        try:
+            amount = Decimal(row['amount'].strip())
+        except (InvalidOperation, AttributeError):
+            errors['amount'] = ['A valid number is required.']
+        else:
+            if not amount.is_finite() or not (0 < amount <= MAX_AMOUNT):
+                errors['amount'] = [AMOUNT_ERROR]
+            elif amount.as_tuple().exponent < -2:
+                errors['amount'] = ['Ensure that there are no more than 2 decimal places.']
+
+        category = (row['category'] or '').strip().upper()
+        if category not in categories:
+            errors['category'] = [CATEGORY_ERROR]
+
+        try:
+            day = date.fromisoformat((row['date'] or '').strip())
+        except ValueError:
+            errors['date'] = ['Date has wrong format. Use YYYY-MM-DD.']
+        else:
+            if day > today:
+                errors['date'] = [FUTURE_DATE_ERROR]
+            elif day < oldest:
+                errors['date'] = [OLD_DATE_ERROR]
+
+        if errors:
+            rejects.append((line, errors))
+        else:
+            valid.append((amount, category, day, row.get('description') or ''))
+    return valid, rejects
+
+
+def _insert_with_copy(user_id, valid):
+    now = timezone.now()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for amount, category, day, description in valid:
+        writer.writerow((user_id, amount, category, day, description, now, now))
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        # CSV COPY reads an unquoted empty field as NULL, but a missing
+        # description is an empty string.
+        cursor.copy_expert(
+            f'COPY {Expense._meta.db_table} ({", ".join(COPY_COLUMNS)}) '
+            'FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (description))',
+            buffer,
+        )
+
+
+def _insert_with_orm(user_id, valid):
+    Expense.objects.bulk_create(
+        Expense(user_id=user_id, amount=amount, category=category,
+                date=day, description=description)
+        for amount, category, day, description in valid
+    )
+
+
+def can_copy():
+    return connection.vendor == 'postgresql'
+
+
+def import_expenses(user, stream, batch_size=IMPORT_BATCH_SIZE,
+                    use_copy=None, on_reject=None):
+    """
+    Imports expenses for ``user`` from a CSV text stream.
+
+    The header must name amount, category and date; description is
+    optional. Rows are parsed incrementally and each batch is validated,
+    inserted (PostgreSQL COPY when available, else bulk_create) and
+    committed on its own, so memory stays bounded by ``batch_size``.
+    ``on_reject(line_number, errors)`` is called for every invalid row.
+    """
+    reader = csv.DictReader(stream)
+    header = {name.strip().lower() for name in reader.fieldnames or ()}
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ImportFormatError(f'Missing CSV columns: {", ".join(missing)}.')
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+
+    if use_copy is None:
+        use_copy = can_copy()
+    insert = _insert_with_copy if use_copy else _insert_with_orm
+
+    result = ImportResult()
+    batch = []
+
+    def flush():
+        valid, rejects = validate_batch(batch)
+        batch.clear()
+        for line, errors in rejects:
+            result.rejected += 1
+            if on_reject:
+                on_reject(line, errors)
+        if not valid:
+            return
+        with transaction.atomic():
+            insert(user.pk, valid)
+            expenses_changed(added=[
+                ExpenseRow(None, user.pk, day, category, amount)
+                for amount, category, day, _ in valid
+            ])
+        result.imported += len(valid)
+
+    for row in reader:
+        batch.append((reader.line_num, row))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return result
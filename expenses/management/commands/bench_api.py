@@ -0,0 +1,82 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from expenses.benchmarks import (
+    ENDPOINTS, SIGNUP_EMAIL_PREFIX, compare_results, endpoint_calls, measure,
+    seed_email,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the expense API hot paths against seeded data '
+        '(see seed_expenses): latency percentiles, queries and peak memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email to benchmark as (default: first seeded user).')
+        parser.add_argument('--endpoints', default=','.join(ENDPOINTS),
+                            help=f"Comma-separated subset of: {', '.join(ENDPOINTS)}.")
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request.')
+        parser.add_argument('--save', help='Write results to this JSON file.')
+        parser.add_argument('--baseline', help='Compare against a JSON file written by --save.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed fractional slowdown before flagging a regression.')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['endpoints'].split(',') if name.strip()]
+        unknown = sorted(set(names) - set(ENDPOINTS))
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(unknown)}.")
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+
+        email = options['user'] or seed_email('bench', 0)
+        try:
+            calls = endpoint_calls(email, names=names)
+        except ValueError as exc:
+            raise CommandError(f'{exc} Run seed_expenses first or pass --user.')
+
+        results = []
+        try:
+            for name, call in calls:
+                results.append(measure(
+                    name, call, options['iterations'],
+                    warmup=options['warmup'], cold=options['cold'],
+                ))
+        finally:
+            get_user_model().objects.filter(email__startswith=SIGNUP_EMAIL_PREFIX).delete()
+
+        self.stdout.write(f'Database: {connection.vendor}')
+        self.stdout.write(
+            f"{'endpoint':<16}{'status':>7}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'queries':>9}{'peak KiB':>10}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['name']:<16}{row['status']:>7}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+                f"{row['p99_ms']:>10.2f}{row['queries']:>9}{row['peak_kib']:>10.1f}"
+            )
+
+        if options['save']:
+            with open(options['save'], 'w') as fh:
+                json.dump({'vendor': connection.vendor, 'results': results}, fh, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline']) as fh:
+                baseline = json.load(fh)
+            if baseline.get('vendor') != connection.vendor:
+                self.stderr.write(self.style.WARNING(
+                    f"Baseline was recorded on {baseline.get('vendor')}, not {connection.vendor}."
+                ))
+            regressions = compare_results(results, baseline['results'], options['threshold'])
+            for message in regressions:
+                self.stderr.write(self.style.ERROR(message))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}.')
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline.'))
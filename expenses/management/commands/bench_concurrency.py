@@ -0,0 +1,91 @@
+import asyncio
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.benchmarks import api_client, asgi_get, best_within, run_concurrent, seed_email
+from users.serializers import CustomTokenObtainPairSerializer
+
+# Sync (DRF) and async routes serving the same response.
+PATHS = {
+    'list': ('/api/expenses/', '/api/async/expenses/'),
+    'summary': ('/api/expenses/summary/', '/api/async/expenses/summary/'),
+    'spending_chart': ('/api/expenses/reports/spending_chart/',
+                       '/api/async/expenses/reports/spending_chart/'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput of the sync and async variants of an endpoint '
+        'under ASGI in one process, at increasing concurrency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email to benchmark as (default: first seeded user).')
+        parser.add_argument('--endpoint', choices=sorted(PATHS), default='summary')
+        parser.add_argument('--concurrency', default='1,4,16,64',
+                            help='Comma-separated concurrency levels.')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per level.')
+        parser.add_argument('--p99-ms', type=float, default=100.0,
+                            help='Latency budget for the requests-per-core comparison.')
+        parser.add_argument('--no-cache', action='store_true',
+                            help='Disable the response cache so every request hits the database.')
+
+    def handle(self, *args, **options):
+        email = options['user'] or seed_email('bench', 0)
+        try:
+            user = get_user_model().objects.get(email=email)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user {email}. Run seed_expenses first or pass --user.')
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency takes comma-separated integers.')
+        if options['no_cache']:
+            settings.EXPENSE_RESPONSE_CACHE_TIMEOUT = 0
+
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        headers = (
+            ('Host', api_client().defaults['HTTP_HOST']),
+            ('Authorization', f'Bearer {token}'),
+        )
+        app = get_asgi_application()
+        results = asyncio.run(self.sweep(app, options['endpoint'], headers, levels, options['requests']))
+
+        self.stdout.write(
+            f"{'variant':<8}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}  status"
+        )
+        for variant, rows in results.items():
+            for row in rows:
+                self.stdout.write(
+                    f"{variant:<8}{row['concurrency']:>6}{row['rps']:>10.1f}"
+                    f"{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}  {row['statuses']}"
+                )
+
+        budget = options['p99_ms']
+        best = {variant: best_within(rows, budget) for variant, rows in results.items()}
+        for variant, row in best.items():
+            if row is None:
+                self.stdout.write(f'{variant}: no level met p99 <= {budget:g} ms')
+            else:
+                self.stdout.write(
+                    f"{variant}: {row['rps']:.1f} req/s per process at p99 <= {budget:g} ms "
+                    f"(concurrency {row['concurrency']})"
+                )
+        if best['sync'] and best['async']:
+            gain = best['async']['rps'] / best['sync']['rps']
+            self.stdout.write(self.style.SUCCESS(f'Async serves {gain:.2f}x the requests at the same p99.'))
+
+    async def sweep(self, app, endpoint, headers, levels, total):
+        results = {}
+        for variant, path in zip(('sync', 'async'), PATHS[endpoint]):
+            # Warm up connections, caches and the chart.
+            await run_concurrent(lambda: asgi_get(app, path, headers=headers), 1, 5)
+            results[variant] = [
+                await run_concurrent(lambda: asgi_get(app, path, headers=headers), level, total)
+                for level in levels
+            ]
+        return results
@@ -0,0 +1,52 @@
+import timeit
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from expenses.models import Expense
+from expenses.serializers import ExpenseFastSerializer, ExpenseSerializer
+
+
+def sample_rows(count):
+    start = date.today()
+    return [
+        {
+            'id': i + 1,
+            'amount': Decimal(f'{(i * 37) % 100000 / 100 + 0.01:.2f}'),
+            'category': Expense.CATEGORIES[i % len(Expense.CATEGORIES)][0],
+            'date': start - timedelta(days=i % 1800),
+            'description': f'Expense {i}',
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Compare per-row list serialization cost of ExpenseSerializer and ExpenseFastSerializer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = sample_rows(options['rows'])
+        instances = [Expense(**row) for row in rows]
+
+        slow = JSONRenderer().render(ExpenseSerializer(instances, many=True).data)
+        fast = JSONRenderer().render(ExpenseFastSerializer(rows).data)
+        if slow != fast:
+            raise CommandError('ExpenseFastSerializer output differs from ExpenseSerializer.')
+
+        timings = {}
+        for name, run in (
+            ('ExpenseSerializer', lambda: ExpenseSerializer(instances, many=True).data),
+            ('ExpenseFastSerializer', lambda: ExpenseFastSerializer(rows).data),
+        ):
+            best = min(timeit.repeat(run, number=1, repeat=options['repeat']))
+            timings[name] = best / len(rows) * 1e6
+            self.stdout.write(f'{name:<24}{timings[name]:8.2f} us/row')
+
+        speedup = timings['ExpenseSerializer'] / timings['ExpenseFastSerializer']
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {speedup:.1f}x (output identical)'))
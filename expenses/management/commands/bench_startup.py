@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from expenses.benchmarks import import_times
+
+
+class Command(BaseCommand):
+    help = 'Show what a fresh web worker spends importing (python -X importtime).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Slowest top-level packages to list.')
+
+    def handle(self, *args, **options):
+        times = import_times()
+        packages = {}
+        for module, (self_us, _) in times.items():
+            package = module.split('.')[0]
+            packages[package] = packages.get(package, 0) + self_us
+
+        total = sum(packages.values())
+        self.stdout.write(f'Total import time: {total / 1000:.1f} ms over {len(times)} modules')
+        for package, spent in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'{package:<28}{spent / 1000:8.1f} ms')
+        if 'matplotlib' in packages:
+            self.stdout.write(self.style.WARNING('matplotlib is imported at startup.'))
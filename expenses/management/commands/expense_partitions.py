@@ -0,0 +1,69 @@
+import os
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from expenses import partitions
+
+
+def month_arg(value):
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+class Command(BaseCommand):
+    help = (
+        'Manage monthly partitions of the expense table (PostgreSQL): list them, '
+        'pre-create upcoming months, or detach and archive months before a cutoff.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['list', 'create', 'detach', 'partition'])
+        parser.add_argument('--months-ahead', type=int, default=3,
+                            help='create/partition: months after the current one to pre-create.')
+        parser.add_argument('--before', type=month_arg, metavar='YYYY-MM',
+                            help='detach: months ending on or before this month start.')
+        parser.add_argument('--archive-dir',
+                            help='detach: write each month to <dir>/<partition>.csv.gz and drop it.')
+
+    def handle(self, *args, **options):
+        if not partitions.is_supported():
+            raise CommandError('Expense partitioning requires PostgreSQL.')
+        action = options['action']
+        if action == 'partition':
+            partitions.partition(months_ahead=options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS('The expense table is partitioned by month.'))
+            return
+        if not partitions.is_partitioned():
+            raise CommandError(
+                "The expense table is not partitioned; run the 'partition' action "
+                'or migrate with EXPENSE_PARTITIONING on.'
+            )
+        getattr(self, f'handle_{action}')(**options)
+
+    def handle_list(self, **options):
+        for name, first, end in partitions.partitions():
+            self.stdout.write(f'{name}\t{first}\t{end}')
+
+    def handle_create(self, months_ahead, **options):
+        this_month = partitions.month_start(timezone.now().date())
+        created = partitions.create_partitions(
+            this_month, partitions.add_months(this_month, months_ahead)
+        )
+        self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partitions.'))
+
+    def handle_detach(self, before, archive_dir, **options):
+        if before is None:
+            raise CommandError('detach needs --before YYYY-MM.')
+        if archive_dir:
+            os.makedirs(archive_dir, exist_ok=True)
+        for name, _, end in partitions.partitions():
+            if end > before:
+                continue
+            removed = partitions.detach_partition(name)
+            message = f'Detached {name} ({removed} expenses)'
+            if archive_dir:
+                path = os.path.join(archive_dir, f'{name}.csv.gz')
+                partitions.archive_partition(name, path)
+                message += f', archived to {path}'
+            self.stdout.write(message + '.')
@@ -0,0 +1,51 @@
+import io
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.importers import IMPORT_BATCH_SIZE, ImportFormatError, import_expenses
+
+
+class Command(BaseCommand):
+    help = 'Import expenses for a user from a CSV file (amount, category, date, description).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file to import, or '-' for stdin.")
+        parser.add_argument('--user', required=True, help='Email of the owning user.')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Insert with bulk_create even when PostgreSQL COPY is available.',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}.")
+
+        def report(line, errors):
+            self.stderr.write(f'line {line}: {json.dumps(errors)}')
+
+        if options['path'] == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        else:
+            stream = open(options['path'], encoding='utf-8-sig', newline='')
+
+        with stream:
+            try:
+                result = import_expenses(
+                    user, stream,
+                    batch_size=options['batch_size'],
+                    use_copy=False if options['no_copy'] else None,
+                    on_reject=report,
+                )
+            except ImportFormatError as exc:
+                raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.imported} expenses, rejected {result.rejected}.'
+        ))
@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from expenses.recurring import CHUNK_SIZE, materialize
+
+
+class Command(BaseCommand):
+    help = (
+        'Create the expenses of every recurring schedule due by today. '
+        'Safe to rerun and to run concurrently; schedule it from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                            help='Materialize occurrences up to this day instead of today.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Schedules locked and written per transaction.')
+
+    def handle(self, *args, **options):
+        until = options['date'] or timezone.now().date()
+        if until > timezone.now().date():
+            raise CommandError('Future expenses are not allowed; --date must not be after today.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+        processed, created = materialize(until, options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Materialized {created} expenses from {processed} schedules.'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from expenses.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete expense tombstones older than EXPENSE_TOMBSTONE_RETENTION_DAYS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Override the retention window.')
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} tombstones.'))
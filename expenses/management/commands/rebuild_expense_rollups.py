@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses import rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the monthly expense rollups from raw expense rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email of a single user to rebuild.')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            User = get_user_model()
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}.")
+
+        rollups.rebuild(user)
+        self.stdout.write(self.style.SUCCESS('Expense rollups rebuilt.'))
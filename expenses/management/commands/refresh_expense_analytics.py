@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from expenses.analytics import refresh
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the admin analytics summaries from the expense rollups.'
+
+    def handle(self, *args, **options):
+        refreshed_at = refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f'Analytics refreshed at {refreshed_at:%Y-%m-%d %H:%M:%S}.'
+        ))
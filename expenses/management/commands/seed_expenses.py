@@ -0,0 +1,80 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from expenses import rollups
+from expenses.benchmarks import SEED_PASSWORD, seed_email
+from expenses.models import Expense
+from expenses.serializers import MAX_AMOUNT, MAX_HISTORY_DAYS
+
+# Relative frequency and median amount per category.
+CATEGORY_WEIGHTS = {'GROCERIES': 6, 'UTILITIES': 2, 'ENTERTAINMENT': 3}
+CATEGORY_MEDIANS = {'GROCERIES': 45, 'UTILITIES': 120, 'ENTERTAINMENT': 30}
+# Mean age in days; most expenses are recent, a long tail reaches back years.
+MEAN_AGE_DAYS = 180
+
+
+def sample_expense(rng, user_id, today):
+    category = rng.choices(
+        list(CATEGORY_WEIGHTS), weights=list(CATEGORY_WEIGHTS.values())
+    )[0]
+    amount = Decimal(f'{rng.lognormvariate(0, 0.75) * CATEGORY_MEDIANS[category]:.2f}')
+    age = min(int(rng.expovariate(1 / MEAN_AGE_DAYS)), MAX_HISTORY_DAYS)
+    return Expense(
+        user_id=user_id,
+        amount=min(max(amount, Decimal('0.01')), MAX_AMOUNT),
+        category=category,
+        date=today - timedelta(days=age),
+        description=f'Seeded {category.lower()}',
+    )
+
+
+class Command(BaseCommand):
+    help = 'Create N users with M expenses each for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--expenses', type=int, default=1000, help='Expenses per user.')
+        parser.add_argument('--prefix', default='bench', help='Email prefix of seeded users.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--reset', action='store_true',
+                            help='Delete previously seeded users with this prefix first.')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        prefix = options['prefix']
+        emails = [seed_email(prefix, i) for i in range(options['users'])]
+
+        existing = User.objects.filter(email__in=emails)
+        if existing.exists():
+            if not options['reset']:
+                raise CommandError('Seeded users already exist; pass --reset to replace them.')
+            existing.delete()
+
+        rng = random.Random(options['seed'])
+        today = timezone.now().date()
+        password = make_password(SEED_PASSWORD)
+
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                User(email=email, name=f'Bench User {i}', password=password)
+                for i, email in enumerate(emails)
+            )
+            for user in users:
+                Expense.objects.bulk_create(
+                    (sample_expense(rng, user.pk, today) for _ in range(options['expenses'])),
+                    batch_size=options['batch_size'],
+                )
+                rollups.rebuild(user)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users x {options['expenses']} expenses "
+            f"(log in as {emails[0] if emails else '-'} / {SEED_PASSWORD})."
+        ))
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-17 05:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Expense = apps.get_model('expenses', 'Expense')
+    ExpenseRollup = apps.get_model('expenses', 'ExpenseRollup')
+    rows = (
+        Expense.objects.order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('user_id', 'month', 'category')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    ExpenseRollup.objects.bulk_create(
+        (ExpenseRollup(**row) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0003_expense_timestamps_and_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('category', models.CharField(choices=[('GROCERIES', 'Groceries'), ('UTILITIES', 'Utilities'), ('ENTERTAINMENT', 'Entertainment')], max_length=50)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-month', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'month', 'category'), name='unique_expense_rollup')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    "CREATE INDEX expenses_expense_search_gin ON expenses_expense USING gin (search_vector)",
+    """
+    CREATE TRIGGER expenses_expense_search_update
+    BEFORE INSERT OR UPDATE ON expenses_expense
+    FOR EACH ROW EXECUTE FUNCTION
+    tsvector_update_trigger(search_vector, 'pg_catalog.english', description)
+    """,
+    "UPDATE expenses_expense SET search_vector = to_tsvector('pg_catalog.english', description)",
+]
+POSTGRES_BACKWARD = [
+    "DROP TRIGGER IF EXISTS expenses_expense_search_update ON expenses_expense",
+    "DROP INDEX IF EXISTS expenses_expense_search_gin",
+]
+
+# External-content FTS5 table: only the index is stored, rows stay in
+# expenses_expense and triggers mirror every write.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE expenses_expense_fts USING fts5(
+        description, content='expenses_expense', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER expenses_expense_fts_insert AFTER INSERT ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER expenses_expense_fts_delete AFTER DELETE ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(expenses_expense_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER expenses_expense_fts_update AFTER UPDATE OF description ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(expenses_expense_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+        INSERT INTO expenses_expense_fts(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    "INSERT INTO expenses_expense_fts(expenses_expense_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS expenses_expense_fts_update",
+    "DROP TRIGGER IF EXISTS expenses_expense_fts_delete",
+    "DROP TRIGGER IF EXISTS expenses_expense_fts_insert",
+    "DROP TABLE IF EXISTS expenses_expense_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, ()):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0004_expenserollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0005_expense_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', '-date', '-id', 'amount'], name='expense_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'category', '-date', '-id', 'amount'], name='expense_user_cat_date_idx'),
+        ),
+        # The new indexes lead with the same columns; drop the old ones last.
+        migrations.RemoveIndex(
+            model_name='expense',
+            name='expenses_ex_user_id_713a9d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='expense',
+            name='expenses_ex_categor_fcaba7_idx',
+        ),
+    ]
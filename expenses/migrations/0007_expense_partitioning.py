@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def partition(apps, schema_editor):
+    if settings.EXPENSE_PARTITIONING and schema_editor.connection.vendor == 'postgresql':
+        from expenses import partitions
+        partitions.partition()
+
+
+def unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        from expenses import partitions
+        partitions.unpartition()
+
+
+# Converts the expense table to monthly range partitions when
+# EXPENSE_PARTITIONING is on (PostgreSQL only); see expenses.partitions.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0006_expense_covering_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
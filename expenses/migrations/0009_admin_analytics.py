@@ -0,0 +1,107 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:24
+
+from django.db import migrations, models
+
+# Both summaries are built from the rollups, never from expenses_expense;
+# expenses.analytics refreshes them. REFRESH ... CONCURRENTLY needs the
+# unique indexes.
+MONTHLY_SPEND = """
+    SELECT month, category, SUM(total), SUM(count), COUNT(DISTINCT user_id)
+    FROM expenses_expenserollup WHERE count > 0 GROUP BY month, category
+"""
+USER_SPEND = """
+    SELECT month, user_id, SUM(total), SUM(count)
+    FROM expenses_expenserollup WHERE count > 0 GROUP BY month, user_id
+"""
+
+POSTGRES_FORWARD = [
+    "CREATE MATERIALIZED VIEW expenses_analytics_monthly_spend "
+    "(month, category, total, expense_count, active_users) AS " + MONTHLY_SPEND,
+    "CREATE UNIQUE INDEX expenses_analytics_monthly_spend_key "
+    "ON expenses_analytics_monthly_spend (month, category)",
+    "CREATE MATERIALIZED VIEW expenses_analytics_user_spend "
+    "(month, user_id, total, expense_count) AS " + USER_SPEND,
+    "CREATE UNIQUE INDEX expenses_analytics_user_spend_key "
+    "ON expenses_analytics_user_spend (month, user_id)",
+]
+POSTGRES_BACKWARD = [
+    "DROP MATERIALIZED VIEW IF EXISTS expenses_analytics_user_spend",
+    "DROP MATERIALIZED VIEW IF EXISTS expenses_analytics_monthly_spend",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE TABLE expenses_analytics_monthly_spend (
+        month date NOT NULL, category varchar(50) NOT NULL, total decimal NOT NULL,
+        expense_count bigint NOT NULL, active_users bigint NOT NULL,
+        PRIMARY KEY (month, category)
+    )
+    """,
+    "INSERT INTO expenses_analytics_monthly_spend "
+    "(month, category, total, expense_count, active_users) " + MONTHLY_SPEND,
+    """
+    CREATE TABLE expenses_analytics_user_spend (
+        month date NOT NULL, user_id char(32) NOT NULL, total decimal NOT NULL,
+        expense_count bigint NOT NULL,
+        PRIMARY KEY (month, user_id)
+    )
+    """,
+    "INSERT INTO expenses_analytics_user_spend "
+    "(month, user_id, total, expense_count) " + USER_SPEND,
+]
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS expenses_analytics_user_spend",
+    "DROP TABLE IF EXISTS expenses_analytics_monthly_spend",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, ()):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0008_expense_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySpend',
+            fields=[
+                ('pk', models.CompositePrimaryKey('month', 'category', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField()),
+                ('category', models.CharField(choices=[('GROCERIES', 'Groceries'), ('UTILITIES', 'Utilities'), ('ENTERTAINMENT', 'Entertainment')], max_length=50)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('expense_count', models.BigIntegerField()),
+                ('active_users', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'expenses_analytics_monthly_spend',
+                'ordering': ['month', 'category'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='UserMonthlySpend',
+            fields=[
+                ('pk', models.CompositePrimaryKey('month', 'user', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('expense_count', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'expenses_analytics_user_spend',
+                'ordering': ['month', '-total'],
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
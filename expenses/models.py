@@ -1,6 +1,8 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 
 class Expense(models.Model):
@@ -31,13 +33,257 @@ class Expense(models.Model):
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Filled by a trigger and GIN-indexed on PostgreSQL; SQLite searches an
+    # FTS5 table instead (see expenses.search).
+    search_vector = SearchVectorField(null=True, editable=False)
+    # The schedule this expense was materialized from, if any. The unique
+    # (recurring, date) constraint below doubles as its index.
+    recurring = models.ForeignKey(
+        'RecurringExpense',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False,
+        related_name='occurrences'
+    )
 
     class Meta:
+        # Every read is scoped to one user and ordered by (date, id), the
+        # pagination keyset. amount trails the keys so summaries and
+        # amount-range filters are answered from the index alone.
         indexes = [
-            models.Index(fields=['user', 'date']),
-            models.Index(fields=['category']),
+            models.Index(
+                fields=['user', '-date', '-id', 'amount'],
+                name='expense_user_date_idx',
+            ),
+            models.Index(
+                fields=['user', 'category', '-date', '-id', 'amount'],
+                name='expense_user_cat_date_idx',
+            ),
+            # The sync keyset (see expenses.sync).
+            models.Index(
+                fields=['user', 'updated_at', 'id'],
+                name='expense_user_updated_idx',
+            ),
+        ]
+        constraints = [
+            # One expense per schedule occurrence, however many times
+            # materialize_recurring runs. Partial, so it only indexes
+            # materialized rows (and SQLite adds it without rebuilding
+            # the table and its search triggers).
+            models.UniqueConstraint(
+                fields=['recurring', 'date'],
+                condition=models.Q(recurring__isnull=False),
+                name='unique_recurring_occurrence'
+            ),
         ]
         ordering = ['-date']
 
     def __str__(self):
-        return f"{self.category} - ${self.amount} on {self.date}"
\ No newline at end of file
+        return f"{self.category} - ${self.amount} on {self.date}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so rollups can be corrected on save.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+class ExpenseRollup(models.Model):
+    """
+    Per-user monthly spending totals by category, kept in step with Expense.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='expense_rollups'
+    )
+    month = models.DateField()
+    category = models.CharField(
+        max_length=50,
+        choices=Expense.CATEGORIES
+    )
+    total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'month', 'category'],
+                name='unique_expense_rollup'
+            ),
+        ]
+        ordering = ['-month', 'category']
+
+    def __str__(self):
+        return f"{self.category} - ${self.total} in {self.month:%Y-%m}"
+
+
+class ExpenseTombstone(models.Model):
+    """
+    Records a deleted expense so sync clients can drop their copy.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='expense_tombstones'
+    )
+    expense_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'deleted_at', 'id'],
+                name='tombstone_user_deleted_idx',
+            ),
+        ]
+        ordering = ['deleted_at', 'id']
+
+    def __str__(self):
+        return f"Expense {self.expense_id} deleted at {self.deleted_at}"
+
+
+class Budget(models.Model):
+    """
+    A user's monthly spending limit for one category.
+
+    Spending against it is not stored here: the ExpenseRollup of the same
+    user, month and category is the running total (see expenses.budgets).
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='budgets'
+    )
+    category = models.CharField(
+        max_length=50,
+        choices=Expense.CATEGORIES
+    )
+    limit = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        validators=[MinValueValidator(0.01)]
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'category'],
+                name='unique_budget_category'
+            ),
+        ]
+        ordering = ['category']
+
+    def __str__(self):
+        return f"{self.category} budget of ${self.limit}"
+
+
+class RecurringExpense(models.Model):
+    """
+    A schedule the materialize_recurring command turns into expenses.
+
+    Occurrences fall every ``interval`` days, weeks, months or years from
+    ``start_date``; monthly and yearly ones keep its day of the month,
+    clamped in shorter months (see expenses.recurring).
+    """
+    FREQUENCIES = [
+        ('DAILY', 'Daily'),
+        ('WEEKLY', 'Weekly'),
+        ('MONTHLY', 'Monthly'),
+        ('YEARLY', 'Yearly'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='recurring_expenses'
+    )
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(0.01)]
+    )
+    category = models.CharField(
+        max_length=50,
+        choices=Expense.CATEGORIES
+    )
+    description = models.TextField(blank=True)
+    frequency = models.CharField(
+        max_length=10,
+        choices=FREQUENCIES
+    )
+    interval = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[MinValueValidator(1)]
+    )
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    # The next occurrence still to materialize; null once past end_date.
+    next_run = models.DateField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Finding due schedules is a range scan over live ones only.
+            models.Index(
+                fields=['next_run', 'id'],
+                name='recurring_next_run_idx',
+                condition=models.Q(next_run__isnull=False),
+            ),
+        ]
+        ordering = ['start_date']
+
+    def __str__(self):
+        return f"{self.category} - ${self.amount} {self.get_frequency_display().lower()}"
+
+
+class MonthlySpend(models.Model):
+    """
+    Spending across all users per month and category, for admin analytics.
+
+    Read-only: a materialized view on PostgreSQL, a summary table on
+    other databases, both rebuilt from the rollups by expenses.analytics.
+    """
+    pk = models.CompositePrimaryKey('month', 'category')
+    month = models.DateField()
+    category = models.CharField(max_length=50, choices=Expense.CATEGORIES)
+    total = models.DecimalField(max_digits=16, decimal_places=2)
+    expense_count = models.BigIntegerField()
+    active_users = models.BigIntegerField()
+
+    class Meta:
+        managed = False
+        db_table = 'expenses_analytics_monthly_spend'
+        ordering = ['month', 'category']
+
+
+class UserMonthlySpend(models.Model):
+    """
+    Each user's spending per month; see MonthlySpend.
+    """
+    pk = models.CompositePrimaryKey('month', 'user')
+    month = models.DateField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    total = models.DecimalField(max_digits=16, decimal_places=2)
+    expense_count = models.BigIntegerField()
+
+    class Meta:
+        managed = False
+        db_table = 'expenses_analytics_user_spend'
+        ordering = ['month', '-total']
+
@@ -0,0 +1,129 @@
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class ExpenseCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (date, id) for expense lists.
+
+    Each cursor carries the (date, id) of the last row served, so the next
+    page is a range scan on the (user, date) index instead of an OFFSET.
+    """
+    ordering = ('-date', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self.page_window(queryset, request)
+        if window is None:
+            return None
+        return self.set_page(list(window))
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        Async paginate_queryset(); ``request`` is a DRF Request.
+        """
+        window = self.page_window(queryset, request)
+        if window is None:
+            return None
+        return self.set_page([row async for row in window])
+
+    def page_window(self, queryset, request):
+        """
+        The sliced queryset for the requested page plus one lookahead row.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by('date', 'id')
+        else:
+            queryset = queryset.order_by('-date', '-id')
+
+        if current_position is not None:
+            queryset = queryset.filter(
+                self._keyset_filter(current_position, after=reverse)
+            )
+
+        self._window = (offset, reverse, current_position)
+        return queryset[offset:offset + self.page_size + 1]
+
+    def set_page(self, results):
+        """
+        Set the page and its cursors from the fetched window rows.
+        """
+        offset, reverse, current_position = self._window
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        # The keyset is fixed; client orderings would invalidate the cursor.
+        return self.ordering
+
+    def _keyset_filter(self, position, after):
+        """
+        Rows strictly before (or after) the (date, id) position.
+
+        The redundant ``date`` bound keeps the predicate sargable so the
+        planner can range-scan the (user, date) index.
+        """
+        try:
+            raw_date, raw_id = position.split('|')
+            pos_date, pos_id = date.fromisoformat(raw_date), int(raw_id)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if after:
+            return Q(date__gte=pos_date) & (
+                Q(date__gt=pos_date) | Q(date=pos_date, id__gt=pos_id)
+            )
+        return Q(date__lte=pos_date) & (
+            Q(date__lt=pos_date) | Q(date=pos_date, id__lt=pos_id)
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            return f"{instance['date'].isoformat()}|{instance['id']}"
+        return f'{instance.date.isoformat()}|{instance.id}'
@@ -0,0 +1,302 @@
+"""
+Optional monthly range partitioning of the expense table on PostgreSQL.
+
+With EXPENSE_PARTITIONING on, migration 0007 turns expenses_expense into
+a table partitioned by ``date``: one partition per month plus a default
+partition for dates no month partition covers yet. Queries narrowed by a
+date range (every ExpenseFilter start_date/end_date) only touch the
+months they overlap.
+
+The primary key becomes (id, date), as PostgreSQL requires the partition
+key in every unique constraint; ids still come from one sequence, so the
+ORM keeps treating ``id`` as the key. The expense_partitions command
+pre-creates months and detaches, archives and drops old ones; detaching
+briefly locks the table, so schedule it off-peak.
+"""
+import gzip
+import re
+from datetime import date
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .caching import bump_data_version
+from .models import Expense, ExpenseRollup, ExpenseTombstone
+
+TABLE = Expense._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+SEQUENCE = f'{TABLE}_id_seq'
+OLD_TABLE = f'{TABLE}_old'
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def partition_month(name):
+    return date(int(name[-6:-2]), int(name[-2:]), 1)
+
+
+def months_between(first, last):
+    """
+    Month starts from ``first``'s month through ``last``'s, inclusive.
+    """
+    month, last = month_start(first), month_start(last)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned():
+    if not is_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = %s::regclass', [TABLE])
+        return cursor.fetchone()[0] == 'p'
+
+
+def partitions():
+    """
+    ``(name, first_day, end_day)`` per month partition, oldest first.
+
+    ``end_day`` is exclusive; the default partition is not listed.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            """,
+            [TABLE],
+        )
+        names = sorted(row[0] for row in cursor.fetchall() if row[0] != DEFAULT_PARTITION)
+    return [
+        (name, partition_month(name), add_months(partition_month(name), 1))
+        for name in names
+    ]
+
+
+def _copy_definitions(cursor, source, target):
+    """
+    Indexes, foreign keys and triggers of ``source``, rewritten for ``target``.
+
+    The primary key is left out: the partitioned and plain tables need
+    different ones.
+    """
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(indexrelid) FROM pg_index
+        WHERE indrelid = %s::regclass AND NOT indisprimary
+        """,
+        [source],
+    )
+    statements = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('f', 'c')
+        """,
+        [source],
+    )
+    statements += [
+        f'ALTER TABLE {target} ADD CONSTRAINT {name} {definition}'
+        for name, definition in cursor.fetchall()
+    ]
+    cursor.execute(
+        """
+        SELECT pg_get_triggerdef(oid) FROM pg_trigger
+        WHERE tgrelid = %s::regclass AND NOT tgisinternal
+        """,
+        [source],
+    )
+    statements += [row[0] for row in cursor.fetchall()]
+    on_source = re.compile(rf' ON (\w+\.)?{source} ')
+    return [on_source.sub(f' ON {target} ', statement) for statement in statements]
+
+
+def _rebuild(partitioned, months_ahead=0):
+    """
+    Recreate the expense table partitioned (or not) and move the rows over.
+
+    Takes an exclusive lock for the copy; run it in a maintenance window.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}')
+        # Frees the names; the definitions are replayed on the new table.
+        definitions = _copy_definitions(cursor, OLD_TABLE, TABLE)
+        cursor.execute(
+            """
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('f', 'c')
+            """,
+            [OLD_TABLE],
+        )
+        for (name,) in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {OLD_TABLE} DROP CONSTRAINT {name}')
+        cursor.execute(
+            """
+            SELECT indexrelid::regclass::text FROM pg_index
+            WHERE indrelid = %s::regclass AND NOT indisprimary
+            """,
+            [OLD_TABLE],
+        )
+        for (name,) in cursor.fetchall():
+            cursor.execute(f'DROP INDEX {name}')
+
+        suffix = ' PARTITION BY RANGE (date)' if partitioned else ''
+        cursor.execute(
+            f'CREATE TABLE {TABLE} (LIKE {OLD_TABLE} INCLUDING DEFAULTS){suffix}'
+        )
+        # Identity columns are not allowed on partitioned tables before
+        # PostgreSQL 17, so ids come from an owned sequence.
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {OLD_TABLE}')
+        next_id = cursor.fetchone()[0]
+        cursor.execute(f'CREATE SEQUENCE {TABLE}_seq_new START WITH {next_id}')
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_seq_new')"
+        )
+        cursor.execute(f'ALTER SEQUENCE {TABLE}_seq_new OWNED BY {TABLE}.id')
+        key = '(id, date)' if partitioned else '(id)'
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey_new PRIMARY KEY {key}')
+
+        if partitioned:
+            cursor.execute(f'SELECT MIN(date), MAX(date) FROM {OLD_TABLE}')
+            first, last = cursor.fetchone()
+            today = date.today()
+            cursor.execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT')
+            for month in months_between(
+                min(first or today, today), add_months(max(last or today, today), months_ahead)
+            ):
+                cursor.execute(
+                    f'CREATE TABLE {partition_name(month)} PARTITION OF {TABLE} '
+                    'FOR VALUES FROM (%s) TO (%s)',
+                    [month, add_months(month, 1)],
+                )
+        for statement in definitions:
+            cursor.execute(statement)
+
+        cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}')
+        cursor.execute(f'DROP TABLE {OLD_TABLE}')
+        cursor.execute(f'ALTER SEQUENCE {TABLE}_seq_new RENAME TO {SEQUENCE}')
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME CONSTRAINT {TABLE}_pkey_new TO {TABLE}_pkey')
+
+
+def partition(months_ahead=3):
+    """
+    Convert the expense table to monthly partitions, if not already.
+    """
+    if not is_partitioned():
+        _rebuild(partitioned=True, months_ahead=months_ahead)
+
+
+def unpartition():
+    """
+    Convert a partitioned expense table back to a plain one.
+    """
+    if is_partitioned():
+        _rebuild(partitioned=False)
+
+
+def create_partitions(first, last):
+    """
+    Make sure every month from ``first`` to ``last`` has a partition.
+
+    Rows the default partition already holds for a new month move into it
+    in the same transaction. Returns the names created.
+    """
+    existing = {name for name, _, _ in partitions()}
+    created = []
+    for month in months_between(first, last):
+        name = partition_name(month)
+        if name in existing:
+            continue
+        end = add_months(month, 1)
+        with transaction.atomic(), connection.cursor() as cursor:
+            # The CHECK lets ATTACH skip validating the new table's rows.
+            cursor.execute(
+                f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS, '
+                f'CHECK (date >= %s AND date < %s))',
+                [month, end],
+            )
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} '
+                f'WHERE date >= %s AND date < %s RETURNING *) '
+                f'INSERT INTO {name} SELECT * FROM moved',
+                [month, end],
+            )
+            cursor.execute(
+                f'ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)',
+                [month, end],
+            )
+        created.append(name)
+    return created
+
+
+def detach_partition(name):
+    """
+    Take a month out of the expense table.
+
+    PostgreSQL refuses DETACH ... CONCURRENTLY while a default partition
+    exists, so this is a plain DETACH. It takes an exclusive lock on the
+    expense table, so it commits on its own (call it outside a
+    transaction) and holds that lock only for the catalog change. The
+    cleanup then reads the detached table in a second transaction: the
+    affected users' rollups and cached responses are corrected, and each
+    detached expense gets a tombstone so sync clients drop it.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+    return account_detached(name)
+
+
+def account_detached(name):
+    """
+    Remove a detached partition's rows from rollups, caches and sync.
+
+    Returns the number of expenses. If it fails after the DETACH
+    committed, rerun it for the partition before archiving it.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        # A partition is one month, so each group is exactly one rollup.
+        cursor.execute(
+            f'SELECT user_id, category, SUM(amount), COUNT(*) FROM {name} '
+            'GROUP BY user_id, category'
+        )
+        groups = cursor.fetchall()
+        cursor.execute(
+            f'INSERT INTO {ExpenseTombstone._meta.db_table} (user_id, expense_id, deleted_at) '
+            f'SELECT user_id, id, %s FROM {name}',
+            [timezone.now()],
+        )
+        month = partition_month(name)
+        for user_id, category, total, count in groups:
+            ExpenseRollup.objects.filter(
+                user_id=user_id, month=month, category=category
+            ).update(total=F('total') - total, count=F('count') - count)
+            bump_data_version(user_id)
+    return sum(count for _, _, _, count in groups)
+
+
+def archive_partition(name, path):
+    """
+    Write a detached partition to ``path`` as gzip-compressed CSV, then drop it.
+    """
+    with gzip.open(path, 'wb') as archive, connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)', archive)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE {name}')
@@ -0,0 +1,97 @@
+"""
+EXPLAIN checks for the SQL the expense endpoints actually run.
+
+capture_expense_queries() records the statements a request issues against
+expenses_expense; plan_problems() explains one and lists what keeps it off
+the indexes: a table scan, a sort the index order should have provided
+or, for ``index_only`` reads, row lookups the index should have covered.
+"""
+import itertools
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from .models import Expense
+
+# One representative value per ExpenseFilter parameter; every subset of
+# these is a query shape the list and summary endpoints must serve.
+FILTER_VALUES = {
+    'category': 'GROCERIES',
+    'start_date': '2020-01-01',
+    'end_date': '2030-12-31',
+    'min_amount': '10',
+    'max_amount': '500',
+}
+
+
+def filter_combinations(values=FILTER_VALUES):
+    """
+    Every subset of ``values`` as a query-parameter dict, smallest first.
+    """
+    keys = list(values)
+    for size in range(len(keys) + 1):
+        for chosen in itertools.combinations(keys, size):
+            yield {key: values[key] for key in chosen}
+
+
+def capture_expense_queries(call, using='default'):
+    """
+    Run ``call()`` and return the SQL of its queries on expenses_expense.
+    """
+    table = Expense._meta.db_table
+    with CaptureQueriesContext(connections[using]) as ctx:
+        call()
+    return [
+        query['sql'] for query in ctx.captured_queries
+        if query['sql'].lstrip().upper().startswith('SELECT')
+        and f'FROM "{table}"' in query['sql']
+    ]
+
+
+def explain(sql, using='default'):
+    """
+    Plan lines for ``sql``, a fully interpolated SELECT.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+        if connection.vendor == 'postgresql':
+            # Small test tables would otherwise always be seq-scanned.
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute(f'EXPLAIN {sql}')
+                return [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.execute('RESET enable_seqscan')
+    raise NotImplementedError(f'No plan checks for {connection.vendor}.')
+
+
+def plan_problems(sql, index_only=False, using='default'):
+    """
+    Human-readable reasons ``sql`` is not served by an index, if any.
+    """
+    plan = explain(sql, using)
+    table = Expense._meta.db_table
+    problems = []
+    if connections[using].vendor == 'sqlite':
+        reads = [line for line in plan if table in line and 'fts' not in line]
+        for line in reads:
+            if 'INDEX' not in line:
+                problems.append(f'table scan: {line}')
+            elif index_only and 'COVERING INDEX' not in line:
+                problems.append(f'row lookups: {line}')
+        problems.extend(f'sort: {line}' for line in plan if 'TEMP B-TREE' in line)
+    else:
+        reads = [line for line in plan if f' on {table}' in line]
+        for line in reads:
+            if 'Seq Scan' in line:
+                problems.append(f'table scan: {line.strip()}')
+            elif index_only and 'Index Only Scan' not in line:
+                problems.append(f'row lookups: {line.strip()}')
+        problems.extend(
+            f'sort: {line.strip()}' for line in plan
+            if line.strip().lstrip('-> ').startswith('Sort')
+        )
+    return problems
@@ -0,0 +1,155 @@
+"""
+Materializing recurring expense schedules into Expense rows.
+
+Each schedule keeps ``next_run``, the first occurrence not yet turned
+into an expense, under a partial (next_run, id) index. materialize()
+walks the due schedules in keyset order, one chunk per transaction:
+it locks the chunk, bulk-creates every occurrence up to the cutoff,
+moves each next_run past it and applies the rollup and cache side
+effects once for the batch.
+
+Runs are idempotent. Locked schedules are skipped, so overlapping runs
+split the work instead of repeating it, and the unique (recurring, date)
+constraint on Expense rejects any occurrence inserted twice.
+"""
+import calendar
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Expense, RecurringExpense
+from .rollups import expense_row
+from .signals import expenses_changed
+
+CHUNK_SIZE = 1000
+
+
+def _add_months(day, months, anchor):
+    index = day.year * 12 + day.month - 1 + months
+    year, month = index // 12, index % 12 + 1
+    return date(year, month, min(anchor, calendar.monthrange(year, month)[1]))
+
+
+def occurrence(schedule, n):
+    """
+    The ``n``-th occurrence (from 0) of ``schedule``.
+
+    Always computed from start_date, so a schedule anchored on the 31st
+    returns to it after shorter months.
+    """
+    start, step = schedule.start_date, n * schedule.interval
+    if schedule.frequency == 'DAILY':
+        return start + timedelta(days=step)
+    if schedule.frequency == 'WEEKLY':
+        return start + timedelta(weeks=step)
+    if schedule.frequency == 'MONTHLY':
+        return _add_months(start, step, start.day)
+    return _add_months(start, 12 * step, start.day)
+
+
+def _first_index(schedule, day):
+    """
+    The index of the first occurrence on or after ``day``.
+    """
+    start = schedule.start_date
+    if schedule.frequency == 'DAILY':
+        units = (day - start).days
+    elif schedule.frequency == 'WEEKLY':
+        units = (day - start).days // 7
+    elif schedule.frequency == 'MONTHLY':
+        units = (day.year - start.year) * 12 + day.month - start.month
+    else:
+        units = day.year - start.year
+    # The estimate can overshoot by one where a month is clamped.
+    n = max(units // schedule.interval - 1, 0)
+    while occurrence(schedule, n) < day:
+        n += 1
+    return n
+
+
+def first_on_or_after(schedule, day):
+    """
+    The first occurrence of ``schedule`` on or after ``day``, or None
+    when that is past its end_date.
+    """
+    candidate = occurrence(schedule, _first_index(schedule, day))
+    if schedule.end_date and candidate > schedule.end_date:
+        return None
+    return candidate
+
+
+def due_dates(schedule, until):
+    """
+    ``(dates, next_run)``: the occurrences from next_run through ``until``
+    and the first one after them (None once past end_date).
+    """
+    last = min(until, schedule.end_date) if schedule.end_date else until
+    n = _first_index(schedule, schedule.next_run)
+    dates = []
+    while (day := occurrence(schedule, n)) <= last:
+        dates.append(day)
+        n += 1
+    if schedule.end_date and day > schedule.end_date:
+        day = None
+    return dates, day
+
+
+def _materialize_chunk(schedules, until):
+    expenses = []
+    for schedule in schedules:
+        dates, schedule.next_run = due_dates(schedule, until)
+        expenses += [
+            Expense(
+                user_id=schedule.user_id,
+                recurring=schedule,
+                amount=schedule.amount,
+                category=schedule.category,
+                description=schedule.description,
+                date=day,
+            )
+            for day in dates
+        ]
+    if expenses:
+        # Occurrences an interrupted or hand-edited schedule already has;
+        # one range read on the unique (recurring, date) index.
+        existing = set(
+            Expense.objects.filter(
+                recurring__in=schedules, date__gte=min(e.date for e in expenses)
+            ).values_list('recurring_id', 'date')
+        )
+        expenses = [e for e in expenses if (e.recurring_id, e.date) not in existing]
+        Expense.objects.bulk_create(expenses, batch_size=settings.EXPENSE_BULK_BATCH_SIZE)
+        expenses_changed(added=[expense_row(e) for e in expenses])
+    RecurringExpense.objects.bulk_update(
+        schedules, ['next_run'], batch_size=settings.EXPENSE_BULK_BATCH_SIZE
+    )
+    return len(expenses)
+
+
+def materialize(until=None, chunk_size=CHUNK_SIZE):
+    """
+    Create the expenses of every schedule due by ``until`` (default today).
+
+    Returns ``(schedules processed, expenses created)``.
+    """
+    until = until or timezone.now().date()
+    due = RecurringExpense.objects.filter(next_run__lte=until).order_by('next_run', 'id')
+    processed = created = 0
+    position = None
+    while True:
+        with transaction.atomic():
+            chunk = due
+            if position is not None:
+                chunk = chunk.filter(
+                    Q(next_run__gt=position[0]) | Q(next_run=position[0], id__gt=position[1])
+                )
+            schedules = list(chunk.select_for_update(skip_locked=True)[:chunk_size])
+            if not schedules:
+                break
+            position = (schedules[-1].next_run, schedules[-1].id)
+            created += _materialize_chunk(schedules, until)
+            processed += len(schedules)
+    return processed, created
@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Renders a list of flat dicts as CSV.
+
+    Exports stream their own body; this covers the non-streamed responses
+    of the same endpoint. Errors and other non-list payloads have no
+    tabular form and are rendered as JSON, relabelled accordingly.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        response = (renderer_context or {}).get('response')
+        if not isinstance(data, list) or (response is not None and response.status_code >= 400):
+            if response is not None:
+                response['Content-Type'] = JSONRenderer.media_type
+            return JSONRenderer().render(data, renderer_context=renderer_context)
+        buffer = io.StringIO()
+        if data:
+            writer = csv.DictWriter(buffer, fieldnames=list(data[0]))
+            writer.writeheader()
+            writer.writerows(data)
+        return buffer.getvalue().encode(self.charset)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renders a list as newline-delimited JSON, one object per line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(
+            json.dumps(row, cls=encoders.JSONEncoder) + '\n' for row in rows
+        ).encode(self.charset)
+
+
+class ChartImageRenderer(BaseRenderer):
+    """
+    Sends rendered chart bytes as they are.
+
+    Other payloads of the same endpoint (pending status, validation
+    errors) are rendered as JSON and relabelled accordingly.
+    """
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, bytes):
+            return data
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = JSONRenderer.media_type
+        return JSONRenderer().render(data, renderer_context=renderer_context)
+
+
+class PNGRenderer(ChartImageRenderer):
+    media_type = 'image/png'
+    format = 'png'
+
+
+class SVGRenderer(ChartImageRenderer):
+    media_type = 'image/svg+xml'
+    format = 'svg'
+
+
+class ChartDataRenderer(JSONRenderer):
+    """
+    JSON under ``?format=data``: the chart's series, not an image.
+    """
+    format = 'data'
@@ -0,0 +1,59 @@
+"""
+Chart drawing kept free of Django imports so it can run in a spawned
+render process.
+
+matplotlib is imported on first use: most workers never draw a chart and
+should not pay for its import and font cache at startup.
+"""
+from io import BytesIO
+
+CHART_FORMATS = ('png', 'svg')
+
+# Text stays <text> instead of glyph outlines, and ids are stable, which
+# keeps SVG output small and byte-identical across renders.
+SVG_RC = {'svg.fonttype': 'none', 'svg.hashsalt': 'expense-chart'}
+
+
+def load_matplotlib():
+    """
+    Imports matplotlib pinned to the non-interactive Agg backend.
+
+    Returns ``(rc_context, Figure)``. The render pool also runs this as its
+    worker initializer, so the cost is paid at worker start, not on the
+    first chart.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import rc_context
+    from matplotlib.figure import Figure
+    return rc_context, Figure
+
+
+def render_spending_chart(categories, amounts, fmt='png', width=10, height=6, dpi=150):
+    """
+    Returns PNG or SVG bytes of spending totals per category.
+
+    ``width`` and ``height`` are in inches; ``dpi`` only affects PNG.
+    Uses the object-oriented Figure API rather than pyplot, so no global
+    figure state is shared between renders.
+    """
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f'Unsupported chart format: {fmt}')
+    rc_context, Figure = load_matplotlib()
+
+    with rc_context(SVG_RC if fmt == 'svg' else {}):
+        fig = Figure(figsize=(width, height))
+        ax = fig.subplots()
+        ax.bar(categories, amounts)
+        ax.set_title('Spending Distribution')
+        ax.set_xlabel('Category')
+        ax.set_ylabel('Amount (USD)')
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+
+        buffer = BytesIO()
+        if fmt == 'svg':
+            fig.savefig(buffer, format='svg', metadata={'Date': None})
+        else:
+            fig.savefig(buffer, format='png', dpi=dpi)
+    return buffer.getvalue()
@@ -1,39 +1,177 @@
-from io import BytesIO
+import atexit
 import base64
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
-import matplotlib.pyplot as plt
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Sum
 
+from .caching import adata_version, data_version
 from .models import Expense
+from .rendering import load_matplotlib, render_spending_chart
+from .serializers import ChartOptionsSerializer, format_amount
 
+CHART_CACHE_TIMEOUT = 60 * 60 * 24
+CHART_PENDING_TIMEOUT = 60
+DEFAULT_CHART = {'fmt': 'png', 'width': 10, 'height': 6, 'dpi': 150}
 
-def generate_spending_chart(user):
-    """
-    Returns a base64-encoded PNG of spending totals per category.
-    """
-    qs = (
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _category_totals(user):
+    return (
         Expense.objects.filter(user=user)
         .values('category')
         .annotate(total=Sum('amount'))
         .order_by('-total')
     )
-    if not qs:
+
+
+def _split(rows):
+    return (
+        [item['category'] for item in rows],
+        [float(item['total']) for item in rows],
+    )
+
+
+def spending_by_category(user):
+    """
+    Returns (categories, totals) ordered by descending total.
+    """
+    return _split(list(_category_totals(user)))
+
+
+async def aspending_by_category(user):
+    return _split([row async for row in _category_totals(user)])
+
+
+def _series(rows):
+    return [{'category': row['category'], 'total': format_amount(row['total'])} for row in rows]
+
+
+def spending_series(user):
+    """
+    The chart's data for client-side rendering, largest total first.
+    """
+    return _series(_category_totals(user))
+
+
+async def aspending_series(user):
+    return _series([row async for row in _category_totals(user)])
+
+
+def chart_options(fmt, params):
+    """
+    ``(fmt, options)`` for request_spending_chart() from a response format
+    and the query params. Images other than svg, and JSON, are PNGs; only
+    PNGs take a dpi.
+    """
+    options = ChartOptionsSerializer(data=params)
+    options.is_valid(raise_exception=True)
+    options = dict(options.validated_data)
+    if fmt == 'svg':
+        del options['dpi']
+    else:
+        fmt = 'png'
+    return fmt, options
+
+
+def generate_spending_chart(user):
+    """
+    Returns a base64-encoded PNG of spending totals per category.
+    """
+    cats, amts = spending_by_category(user)
+    if not cats:
         return None
+    return base64.b64encode(render_spending_chart(cats, amts)).decode('utf-8')
+
+
+def get_render_executor():
+    """
+    Process pool that keeps chart rendering off the request workers.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'CHART_RENDER_WORKERS', 1),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=load_matplotlib,
+            )
+            atexit.register(_executor.shutdown, wait=False, cancel_futures=True)
+        return _executor
+
+
+def _chart_key(user_id, version, options):
+    spec = ','.join(f'{name}={options[name]}' for name in sorted(options))
+    return f'expenses:chart:{user_id}:{version}:{spec}'
+
+
+def encode_chart(chart):
+    """
+    Base64 text of chart bytes for JSON responses; None stays None.
+    """
+    return None if chart is None else base64.b64encode(chart).decode('utf-8')
+
+
+def request_spending_chart(user, **options):
+    """
+    Returns ``(ready, chart bytes)`` for the user's current data version.
+
+    ``options`` override DEFAULT_CHART (format, size, dpi) and are part of
+    the cache key. A cached chart (or None when there is nothing to plot)
+    comes back ready. Otherwise a render is queued in the process pool, at
+    most once per version and options across all workers, and
+    ``(False, None)`` is returned.
+    """
+    options = {**DEFAULT_CHART, **options}
+    key = _chart_key(user.pk, data_version(user.pk), options)
+    chart = cache.get(key)
+    if chart is not None:
+        return True, chart
+
+    cats, amts = spending_by_category(user)
+    if not cats:
+        return True, None
+
+    if cache.add(f'{key}:pending', 1, timeout=CHART_PENDING_TIMEOUT):
+        _submit_render(key, cats, amts, options)
+    return False, None
+
+
+async def arequest_spending_chart(user, **options):
+    """
+    Async request_spending_chart(); the render itself stays in the pool.
+    """
+    options = {**DEFAULT_CHART, **options}
+    key = _chart_key(user.pk, await adata_version(user.pk), options)
+    chart = await cache.aget(key)
+    if chart is not None:
+        return True, chart
+
+    cats, amts = await aspending_by_category(user)
+    if not cats:
+        return True, None
+
+    if await cache.aadd(f'{key}:pending', 1, timeout=CHART_PENDING_TIMEOUT):
+        _submit_render(key, cats, amts, options)
+    return False, None
 
-    cats = [item['category'] for item in qs]
-    amts = [float(item['total']) for item in qs]
 
-    plt.figure(figsize=(10, 6))
-    plt.bar(cats, amts)
-    plt.title('Spending Distribution')
-    plt.xlabel('Category')
-    plt.ylabel('Amount (USD)')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
+def _submit_render(key, cats, amts, options):
+    future = get_render_executor().submit(render_spending_chart, cats, amts, **options)
+    future.add_done_callback(lambda f: _store_chart(key, f))
 
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png', dpi=150)
-    plt.close()
-    buffer.seek(0)
 
-    return base64.b64encode(buffer.read()).decode('utf-8')
\ No newline at end of file
+def _store_chart(key, future):
+    try:
+        chart = future.result()
+    except Exception:
+        # Let the next poll retry instead of waiting out the marker.
+        cache.delete(f'{key}:pending')
+        raise
+    cache.set(key, chart, CHART_CACHE_TIMEOUT)
+    cache.delete(f'{key}:pending')
@@ -0,0 +1,155 @@
+import calendar
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Expense, ExpenseRollup
+
+ExpenseRow = namedtuple('ExpenseRow', ['id', 'user_id', 'date', 'category', 'amount'])
+
+
+def expense_row(expense):
+    """
+    Snapshot the rollup-relevant fields of an Expense.
+    """
+    opts = Expense._meta
+    return ExpenseRow(
+        expense.id,
+        expense.user_id,
+        opts.get_field('date').to_python(expense.date),
+        expense.category,
+        opts.get_field('amount').to_python(expense.amount),
+    )
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def is_month_end(value):
+    return value.day == calendar.monthrange(value.year, value.month)[1]
+
+
+def apply_changes(added=(), removed=()):
+    """
+    Fold expense rows into the rollup table with atomic F() increments.
+
+    Rows sharing a (user, month, category) key are merged first, so a batch
+    costs one UPDATE per distinct key rather than one per expense.
+    """
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for sign, rows in ((1, added), (-1, removed)):
+        for row in rows:
+            delta = deltas[(row.user_id, month_start(row.date), row.category)]
+            delta[0] += sign * Decimal(row.amount)
+            delta[1] += sign
+
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        # Only keys gaining rows may need creating; a removal never targets a
+        # missing rollup, and creating one could resurrect a deleted user.
+        missing = [
+            ExpenseRollup(user_id=user_id, month=month, category=category)
+            for (user_id, month, category), (_, count) in deltas.items()
+            if count > 0
+        ]
+        if missing:
+            ExpenseRollup.objects.bulk_create(missing, ignore_conflicts=True)
+
+        for (user_id, month, category), (amount, count) in deltas.items():
+            ExpenseRollup.objects.filter(
+                user_id=user_id, month=month, category=category
+            ).update(total=F('total') + amount, count=F('count') + count)
+
+
+def rebuild(user=None):
+    """
+    Recompute rollups from raw expenses, optionally for a single user.
+    """
+    expenses = Expense.objects.all()
+    rollups = ExpenseRollup.objects.all()
+    if user is not None:
+        expenses = expenses.filter(user=user)
+        rollups = rollups.filter(user=user)
+
+    rows = (
+        expenses.order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('user_id', 'month', 'category')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    with transaction.atomic():
+        rollups.delete()
+        ExpenseRollup.objects.bulk_create(
+            (ExpenseRollup(**row) for row in rows.iterator()),
+            batch_size=1000,
+        )
+
+
+def rollups_for(user, params):
+    """
+    The user's rollups matching the cleaned ExpenseFilter data.
+
+    Returns None when the filters cut through a month, set an amount
+    range or search descriptions, which only raw rows can answer.
+    """
+    if params.get('min_amount') is not None or params.get('max_amount') is not None:
+        return None
+    if params.get('q'):
+        return None
+
+    start, end = params.get('start_date'), params.get('end_date')
+    if start and start.day != 1:
+        return None
+    if end and not is_month_end(end):
+        return None
+    if start and end and start > end:
+        return None
+
+    qs = ExpenseRollup.objects.filter(user=user)
+    if start:
+        qs = qs.filter(month__gte=start)
+    if end:
+        qs = qs.filter(month__lte=end)
+    if params.get('category'):
+        qs = qs.filter(category=params['category'])
+    return qs
+
+
+def summarize(user, params):
+    """
+    Answer the summary statistics from rollups.
+
+    ``params`` is the cleaned ExpenseFilter data. Returns None when
+    rollups cannot answer, see rollups_for().
+    """
+    qs = rollups_for(user, params)
+    if qs is None:
+        return None
+
+    return _stats(qs.aggregate(total=Sum('total'), count=Sum('count')))
+
+
+async def asummarize(user, params):
+    """
+    Async summarize().
+    """
+    qs = rollups_for(user, params)
+    if qs is None:
+        return None
+    return _stats(await qs.aaggregate(total=Sum('total'), count=Sum('count')))
+
+
+def _stats(totals):
+    count = totals['count'] or 0
+    return {
+        'total': totals['total'],
+        'average': totals['total'] / count if count else None,
+        'count': count,
+    }
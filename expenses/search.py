@@ -0,0 +1,87 @@
+"""
+Full-text search over expense descriptions.
+
+PostgreSQL matches ``Expense.search_vector`` (GIN-indexed, kept current
+by a trigger) with web-search syntax. SQLite matches an FTS5 table kept
+in step by triggers. Both are set up by migration 0005. Where neither
+exists, every search word must appear as a substring.
+"""
+import re
+from functools import reduce
+from operator import and_
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Expense
+
+FTS_TABLE = 'expenses_expense_fts'
+SEARCH_CONFIG = 'english'
+WORD = re.compile(r'\w+')
+
+# Migration 0005 creates the search structures for these vendors. The
+# choice is made from the vendor alone, so no query runs while picking
+# it (async views filter on the event loop).
+BACKENDS = {'postgresql': 'postgresql', 'sqlite': 'fts5'}
+
+
+def backend(alias):
+    """
+    'postgresql', 'fts5' or 'substring' for the database ``alias``.
+    """
+    return BACKENDS.get(connections[alias].vendor, 'substring')
+
+
+def fts_query(text):
+    """
+    FTS5 MATCH expression: every word, as a quoted prefix, must match.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(text))
+
+
+def _search_query(text):
+    return SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+
+
+def filter_search(queryset, text):
+    """
+    Narrow ``queryset`` to expenses whose description matches ``text``.
+    """
+    kind = backend(queryset.db)
+    if kind == 'postgresql':
+        return queryset.filter(search_vector=_search_query(text))
+
+    words = WORD.findall(text)
+    if not words:
+        return queryset.none()
+    if kind == 'fts5':
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [fts_query(text)],
+        ))
+    return queryset.filter(reduce(and_, (Q(description__icontains=w) for w in words)))
+
+
+def rank_results(queryset, text):
+    """
+    Annotate ``rank`` (higher is better) and order best match first.
+
+    ``queryset`` should already be narrowed with filter_search(); ties
+    fall back to the newest expense.
+    """
+    kind = backend(queryset.db)
+    if kind == 'postgresql':
+        rank = SearchRank(F('search_vector'), _search_query(text))
+    elif kind == 'fts5':
+        # bm25() is lower-is-better; it only works alongside a MATCH.
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {Expense._meta.db_table}.id',
+            [fts_query(text)],
+            output_field=FloatField(),
+        )
+    else:
+        rank = Value(1.0, output_field=FloatField())
+    return queryset.annotate(rank=rank).order_by('-rank', '-date', '-id')
@@ -1,55 +1,334 @@
+from datetime import date
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Expense
+from expense_tracker.instrumentation import serialization_timer
+
+from . import budgets, recurring
+from .models import Budget, Expense, RecurringExpense
+from .rollups import expense_row
+from .signals import expenses_changed
 
 User = get_user_model()
 
+# Shared with the batched CSV importer, which applies the same rules.
+MAX_AMOUNT = 1_000_000
+MAX_HISTORY_DAYS = 365 * 5
+VALID_CATEGORIES = [choice[0] for choice in Expense.CATEGORIES]
+
+AMOUNT_ERROR = 'Amount must be greater than zero and at most 1,000,000.'
+FUTURE_DATE_ERROR = 'Future dates are not allowed.'
+OLD_DATE_ERROR = 'Date cannot be older than 5 years.'
+CATEGORY_ERROR = f'Invalid category. Choose from: {', '.join(VALID_CATEGORIES)}'
+
+
+def allowed_date_range():
+    """
+    Returns the (oldest, newest) expense dates accepted today.
+    """
+    today = timezone.now().date()
+    return today - timezone.timedelta(days=MAX_HISTORY_DAYS), today
+
+
+def clean_amount(value):
+    """
+    ``value`` if it is a valid expense amount.
+    """
+    if not (0 < value <= MAX_AMOUNT):
+        raise serializers.ValidationError(AMOUNT_ERROR)
+    return value
+
+
+def clean_category(value):
+    """
+    ``value`` as an expense category in any letter case, upper-cased.
+    """
+    upper = value.upper()
+    if upper not in VALID_CATEGORIES:
+        raise serializers.ValidationError(CATEGORY_ERROR)
+    return upper
+
+
+class ExpenseListSerializer(serializers.ListSerializer):
+    """
+    Batch create/update for ExpenseSerializer(many=True).
+
+    Writes go out as bulk_create/bulk_update inside one transaction.
+    For updates, ``instance`` is a dict of the targeted expenses keyed by
+    id, and every item must carry the ``id`` it updates.
+    """
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return super().run_child_validation(data)
+
+        expense = self.instance.get(data.get('id')) if isinstance(data, dict) else None
+        if expense is None:
+            raise serializers.ValidationError({'id': ['Expense not found.']})
+        self.child.instance = expense
+        self.child.initial_data = data
+        validated = super().run_child_validation(data)
+        validated['id'] = expense.pk
+        return validated
+
+    @property
+    def data(self):
+        with serialization_timer():
+            return super().data
+
+    def create(self, validated_data):
+        expenses = [Expense(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            Expense.objects.bulk_create(
+                expenses, batch_size=settings.EXPENSE_BULK_BATCH_SIZE
+            )
+            expenses_changed(added=[expense_row(e) for e in expenses])
+        return expenses
+
+    def update(self, instance, validated_data):
+        expenses, removed = [], []
+        fields = {'updated_at'}
+        now = timezone.now()
+        for attrs in validated_data:
+            expense = instance[attrs.pop('id')]
+            attrs.pop('user', None)
+            removed.append(expense_row(expense))
+            for attr, value in attrs.items():
+                setattr(expense, attr, value)
+            fields.update(attrs)
+            # bulk_update does not apply auto_now.
+            expense.updated_at = now
+            expenses.append(expense)
+
+        with transaction.atomic():
+            Expense.objects.bulk_update(
+                expenses, sorted(fields),
+                batch_size=settings.EXPENSE_BULK_BATCH_SIZE,
+            )
+            expenses_changed(
+                added=[expense_row(e) for e in expenses], removed=removed
+            )
+        return expenses
+
 
 class ExpenseSerializer(serializers.ModelSerializer):
     """
     Serializer for Expense model ensuring data validity and formatting.
     """
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    # A plain CharField so validate_category can accept any letter case.
+    category = serializers.CharField(max_length=50)
 
     class Meta:
         model = Expense
         fields = ['id', 'user', 'amount', 'category', 'date', 'description']
         read_only_fields = ['id', 'user']
+        list_serializer_class = ExpenseListSerializer
         extra_kwargs = {
             'amount': {'min_value': 0.01},
             'date': {'format': '%Y-%m-%d'},
         }
 
     def validate_amount(self, value):
-        if not (0 < value <= 1_000_000):
-            raise serializers.ValidationError(
-                'Amount must be greater than zero and at most 1,000,000.'
-            )
-        return value
+        return clean_amount(value)
 
     def validate_date(self, value):
-        today = timezone.now().date()
-        oldest = today - timezone.timedelta(days=365 * 5)
+        oldest, today = allowed_date_range()
 
         if value > today:
-            raise serializers.ValidationError('Future dates are not allowed.')
+            raise serializers.ValidationError(FUTURE_DATE_ERROR)
         if value < oldest:
-            raise serializers.ValidationError('Date cannot be older than 5 years.')
+            raise serializers.ValidationError(OLD_DATE_ERROR)
         return value
 
     def validate_category(self, value):
-        valid = [choice[0] for choice in Expense.CATEGORIES]
-        upper = value.upper()
-        if upper not in valid:
-            raise serializers.ValidationError(
-                f'Invalid category. Choose from: {', '.join(valid)}'
-            )
-        return upper
+        return clean_category(value)
+
+    @property
+    def data(self):
+        with serialization_timer():
+            return super().data
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
         rep['amount'] = f"{instance.amount:.2f}"
         rep['date'] = instance.date.strftime('%Y-%m-%d')
-        return rep
\ No newline at end of file
+        return rep
+
+
+class BudgetSerializer(serializers.ModelSerializer):
+    """
+    A monthly category budget with its status for the context's ``month``.
+
+    Spend comes from ``context['spending']`` ({category: total}) when the
+    view looked it up for a whole list, otherwise from the one rollup.
+    """
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    category = serializers.CharField(max_length=50)
+
+    class Meta:
+        model = Budget
+        fields = ['id', 'user', 'category', 'limit']
+        read_only_fields = ['id', 'user']
+        extra_kwargs = {'limit': {'min_value': 0.01}}
+
+    def validate_category(self, value):
+        return clean_category(value)
+
+    def to_representation(self, instance):
+        rep = super().to_representation(instance)
+        month = self.context['month']
+        spending = self.context.get('spending')
+        if spending is None:
+            spending = budgets.spending(instance.user_id, month, [instance.category])
+        status = format_budget_status(
+            budgets.status(instance, month, spending.get(instance.category))
+        )
+        del status['crossed'], status['category'], status['limit']
+        rep.update(status)
+        return rep
+
+
+class RecurringExpenseSerializer(serializers.ModelSerializer):
+    """
+    A recurring expense schedule; materialize_recurring creates its expenses.
+
+    Only the amount, category, description and end_date of an existing
+    schedule can change; a different cadence is a new schedule.
+    """
+    CADENCE_FIELDS = ('frequency', 'interval', 'start_date')
+
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    category = serializers.CharField(max_length=50)
+
+    class Meta:
+        model = RecurringExpense
+        fields = [
+            'id', 'user', 'amount', 'category', 'description',
+            'frequency', 'interval', 'start_date', 'end_date', 'next_run',
+        ]
+        read_only_fields = ['id', 'user', 'next_run']
+        extra_kwargs = {
+            'amount': {'min_value': 0.01},
+            'interval': {'min_value': 1, 'max_value': 365},
+        }
+
+    def validate_amount(self, value):
+        return clean_amount(value)
+
+    def validate_category(self, value):
+        return clean_category(value)
+
+    def validate_start_date(self, value):
+        if value < allowed_date_range()[0]:
+            raise serializers.ValidationError(OLD_DATE_ERROR)
+        return value
+
+    def validate(self, attrs):
+        if self.instance is not None:
+            changed = [
+                field for field in self.CADENCE_FIELDS
+                if field in attrs and attrs[field] != getattr(self.instance, field)
+            ]
+            if changed:
+                raise serializers.ValidationError(
+                    {field: ['Create a new schedule to change the cadence.'] for field in changed}
+                )
+        start = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if end and end < start:
+            raise serializers.ValidationError({'end_date': ['Must not be before start_date.']})
+        return attrs
+
+    def create(self, validated_data):
+        validated_data['next_run'] = validated_data['start_date']
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        if 'end_date' in validated_data:
+            # A finished schedule materialized everything up to its old end.
+            resume = instance.next_run or instance.end_date + timezone.timedelta(days=1)
+            instance.end_date = validated_data['end_date']
+            validated_data['next_run'] = recurring.first_on_or_after(instance, resume)
+        return super().update(instance, validated_data)
+
+
+format_amount = '{:.2f}'.format
+format_date = date.isoformat
+
+
+def format_budget_status(status):
+    """
+    A budgets.status() dict with its amounts as two-decimal strings, the
+    way DecimalField renders them.
+    """
+    return {
+        **status,
+        **{key: format_amount(status[key]) for key in ('limit', 'spent', 'remaining')},
+    }
+
+
+class ExpenseFastSerializer:
+    """
+    Read-only stand-in for ExpenseSerializer(many=True) on list responses.
+
+    Takes ``.values(*ExpenseFastSerializer.fields)`` rows and builds the
+    same representation with precomputed formatters, skipping DRF's
+    per-field machinery.
+    """
+    fields = ('id', 'amount', 'category', 'date', 'description')
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @property
+    def data(self):
+        amount, day = format_amount, format_date
+        with serialization_timer():
+            return [
+                {
+                    'id': row['id'],
+                    'amount': amount(row['amount']),
+                    'category': row['category'],
+                    'date': day(row['date']),
+                    'description': row['description'],
+                }
+                for row in self.rows
+            ]
+
+
+class ChartOptionsSerializer(serializers.Serializer):
+    """
+    Size and resolution of a rendered spending chart.
+    """
+    MAX_PIXELS = 4000
+
+    width = serializers.FloatField(min_value=1, max_value=20, default=10)
+    height = serializers.FloatField(min_value=1, max_value=20, default=6)
+    dpi = serializers.IntegerField(min_value=50, max_value=300, default=150)
+
+    def validate(self, attrs):
+        if max(attrs['width'], attrs['height']) * attrs['dpi'] > self.MAX_PIXELS:
+            raise serializers.ValidationError(
+                f'Charts are limited to {self.MAX_PIXELS} pixels per side.'
+            )
+        return attrs
+
+
+class AnalyticsRangeSerializer(serializers.Serializer):
+    """
+    Month range (``YYYY-MM``, inclusive) of an admin analytics query.
+    """
+    start = serializers.DateField(input_formats=['%Y-%m'], required=False)
+    end = serializers.DateField(input_formats=['%Y-%m'], required=False)
+    category = serializers.ChoiceField(choices=Expense.CATEGORIES, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError('start must not be after end.')
+        return attrs
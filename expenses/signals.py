@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import rollups
+from .caching import bump_data_version
+from .models import Expense, ExpenseTombstone
+
+_suspended = ContextVar('expense_signals_suspended', default=False)
+
+
+@contextmanager
+def suspended():
+    """
+    Skip the per-row receivers; the caller reports the batch itself.
+    """
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def expenses_changed(added=(), removed=()):
+    """
+    Apply the side effects of expense writes given as ExpenseRows.
+
+    Bulk paths that bypass model signals call this once per batch.
+    """
+    added, removed = list(added), list(removed)
+    for user_id in {row.user_id for row in added + removed}:
+        bump_data_version(user_id)
+    rollups.apply_changes(added=added, removed=removed)
+
+
+def expenses_deleted(rows):
+    """
+    Side effects of deleting the expenses given as ExpenseRows, including
+    the tombstones sync clients read.
+    """
+    rows = list(rows)
+    ExpenseTombstone.objects.bulk_create(
+        ExpenseTombstone(user_id=row.user_id, expense_id=row.id) for row in rows
+    )
+    expenses_changed(removed=rows)
+
+
+def _stored_row(instance):
+    """
+    The row as it was last read from or written to the database.
+    """
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if not set(rollups.ExpenseRow._fields) <= loaded.keys():
+        loaded = (
+            Expense.objects.filter(pk=instance.pk)
+            .values(*rollups.ExpenseRow._fields)
+            .first()
+        )
+        if loaded is None:
+            return None
+    return rollups.ExpenseRow(**{
+        field: loaded[field] for field in rollups.ExpenseRow._fields
+    })
+
+
+@receiver(pre_save, sender=Expense)
+def remember_stored_expense(sender, instance, raw, **kwargs):
+    if raw or instance._state.adding or _suspended.get():
+        return
+    instance._stored_row = _stored_row(instance)
+
+
+@receiver(post_save, sender=Expense)
+def track_expense_save(sender, instance, created, raw, **kwargs):
+    if raw or _suspended.get():
+        return
+    previous = None if created else instance.__dict__.pop('_stored_row', None)
+    row = rollups.expense_row(instance)
+    expenses_changed(added=[row], removed=[previous] if previous else [])
+    instance._loaded_values = row._asdict()
+
+
+@receiver(post_delete, sender=Expense)
+def track_expense_delete(sender, instance, origin=None, **kwargs):
+    if _suspended.get():
+        return
+    if isinstance(origin, Expense) or getattr(origin, 'model', None) is Expense:
+        expenses_deleted([_stored_row(instance) or rollups.expense_row(instance)])
+        return
+    # Cascaded from the user's deletion, which also deletes their rollups
+    # and tombstones: only the cached data needs invalidating, once.
+    if origin is None:
+        bump_data_version(instance.user_id)
+        return
+    bumped = origin.__dict__.setdefault('_expense_versions_bumped', set())
+    if instance.user_id not in bumped:
+        bumped.add(instance.user_id)
+        bump_data_version(instance.user_id)
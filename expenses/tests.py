@@ -1,17 +1,41 @@
 # tests.py
-from django.test import TestCase
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from django.urls import reverse
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Sum
+import asyncio
 import base64
-from datetime import timedelta
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
-from .models import Expense
-from .serializers import ExpenseSerializer
+from . import analytics, benchmarks, exports, partitions, query_plans, recurring, rollups, sync
+from .caching import cache_metrics
+from .models import Budget, Expense, ExpenseRollup, ExpenseTombstone, RecurringExpense
+from .serializers import ExpenseFastSerializer, ExpenseSerializer
 from .filters import ExpenseFilter
+from .importers import ImportFormatError, can_copy, import_expenses
+from .rendering import render_spending_chart
 from .reports import generate_spending_chart
 
 User = get_user_model()
@@ -37,8 +61,8 @@ class ExpenseModelTest(TestCase):
     def test_indexes_and_ordering(self):
         meta = Expense._meta
         index_fields = [tuple(idx.fields) for idx in meta.indexes]
-        self.assertIn(('user', 'date'), index_fields)
-        self.assertIn(('category',), index_fields)
+        self.assertIn(('user', '-date', '-id', 'amount'), index_fields)
+        self.assertIn(('user', 'category', '-date', '-id', 'amount'), index_fields)
         self.assertEqual(meta.ordering, ['-date'])
 
 
@@ -156,10 +180,1378 @@ class ExpenseAPITest(TestCase):
         self.assertEqual(resp.data['total_expenses'], 30.00)
         self.assertEqual(resp.data['transaction_count'], 2)
 
+    def _poll_chart(self, url):
+        resp = self.client.get(url, format='json')
+        deadline = time.monotonic() + 60
+        while resp.status_code == status.HTTP_202_ACCEPTED and time.monotonic() < deadline:
+            time.sleep(0.1)
+            resp = self.client.get(resp.data['poll_url'], format='json')
+        return resp
+
     def test_spending_chart_endpoint(self):
         Expense.objects.create(user=self.user, amount='7.00', category='ENTERTAINMENT', date=timezone.now().date())
         url = reverse('expense-reports-spending-chart')
-        resp = self.client.get(url, format='json')
+        resp = self._poll_chart(url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         self.assertIn('chart', resp.data)
         self.assertIsNotNone(resp.data['chart'])
+
+    def test_spending_chart_is_queued_then_cached(self):
+        cache.clear()
+        Expense.objects.create(user=self.user, amount='7.00', category='ENTERTAINMENT', date=timezone.now().date())
+        url = reverse('expense-reports-spending-chart')
+        first = self.client.get(url, format='json')
+        self.assertEqual(first.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(first['Retry-After'], '1')
+        chart = self._poll_chart(url).data['chart']
+        self.assertTrue(base64.b64decode(chart).startswith(b'\x89PNG'))
+        self.assertEqual(self.client.get(url, format='json').data['chart'], chart)
+
+    def test_spending_chart_invalidated_by_writes(self):
+        url = reverse('expense-reports-spending-chart')
+        with self.captureOnCommitCallbacks(execute=True):
+            Expense.objects.create(user=self.user, amount='7.00', category='ENTERTAINMENT', date=timezone.now().date())
+        self._poll_chart(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Expense.objects.create(user=self.user, amount='9.00', category='GROCERIES', date=timezone.now().date())
+        self.assertEqual(self.client.get(url, format='json').status_code, status.HTTP_202_ACCEPTED)
+
+    def test_spending_chart_without_expenses(self):
+        resp = self.client.get(reverse('expense-reports-spending-chart'), format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIsNone(resp.data['chart'])
+
+
+class ExpensePaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='pages@example.com', name='Pager', password='securepass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('expense-list')
+        today = timezone.now().date()
+        # Several rows share a date so the id tiebreaker is exercised.
+        for i in range(7):
+            Expense.objects.create(
+                user=self.user, amount=f'{i + 1}.00',
+                category='GROCERIES' if i % 2 else 'UTILITIES',
+                date=today - timedelta(days=i // 3),
+            )
+
+    def _collect(self, url, params=None):
+        seen = []
+        resp = self.client.get(url, params)
+        while True:
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in resp.data['results'])
+            if not resp.data['next']:
+                return seen, resp
+            resp = self.client.get(resp.data['next'])
+
+    def test_pages_cover_all_rows_in_keyset_order(self):
+        ids, _ = self._collect(self.url, {'page_size': 2})
+        expected = list(
+            Expense.objects.filter(user=self.user)
+            .order_by('-date', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(self.url, {'page_size': 3})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [item['id'] for item in back.data['results']],
+            [item['id'] for item in first.data['results']],
+        )
+        self.assertIsNone(back.data['previous'])
+
+    def test_filters_apply_across_pages(self):
+        ids, _ = self._collect(self.url, {'page_size': 2, 'category': 'GROCERIES'})
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(
+            set(Expense.objects.filter(id__in=ids).values_list('category', flat=True)),
+            {'GROCERIES'},
+        )
+
+    def test_invalid_cursor(self):
+        resp = self.client.get(self.url, {'cursor': base64.b64encode(b'p=garbage').decode()})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ExpenseRollupTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='rollup@example.com', name='Roller', password='securepass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.month = timezone.now().date().replace(day=1)
+
+    def _rollup(self, category='GROCERIES', month=None):
+        return ExpenseRollup.objects.get(user=self.user, month=month or self.month, category=category)
+
+    def test_create_update_delete_keep_rollup_in_sync(self):
+        expense = Expense.objects.create(user=self.user, amount='10.00', category='GROCERIES', date=self.month)
+        Expense.objects.create(user=self.user, amount='5.50', category='GROCERIES', date=self.month)
+        self.assertEqual((self._rollup().total, self._rollup().count), (Decimal('15.50'), 2))
+
+        expense.amount = Decimal('4.00')
+        expense.category = 'UTILITIES'
+        expense.save()
+        self.assertEqual((self._rollup().total, self._rollup().count), (Decimal('5.50'), 1))
+        self.assertEqual(self._rollup('UTILITIES').total, Decimal('4.00'))
+
+        Expense.objects.get(pk=expense.pk).delete()
+        self.assertEqual(self._rollup('UTILITIES').count, 0)
+
+    def test_batched_changes_merge_per_key(self):
+        rows = [
+            rollups.ExpenseRow(None, self.user.pk, self.month, 'GROCERIES', Decimal('2.00')),
+            rollups.ExpenseRow(None, self.user.pk, self.month, 'GROCERIES', Decimal('3.00')),
+        ]
+        rollups.apply_changes(added=rows)
+        self.assertEqual((self._rollup().total, self._rollup().count), (Decimal('5.00'), 2))
+        rollups.apply_changes(removed=rows[:1])
+        self.assertEqual((self._rollup().total, self._rollup().count), (Decimal('3.00'), 1))
+
+    def test_rebuild_matches_raw_rows(self):
+        Expense.objects.create(user=self.user, amount='8.00', category='GROCERIES', date=self.month)
+        ExpenseRollup.objects.all().delete()
+        rollups.rebuild(self.user)
+        self.assertEqual(self._rollup().total, Decimal('8.00'))
+
+    def test_whole_month_summary_reads_rollups(self):
+        Expense.objects.create(user=self.user, amount='10.00', category='GROCERIES', date=self.month)
+        Expense.objects.create(user=self.user, amount='30.00', category='UTILITIES', date=self.month)
+        # Skew the rollup so the response proves where it was answered from.
+        ExpenseRollup.objects.filter(category='UTILITIES').update(total=Decimal('31.00'))
+        params = {'start_date': self.month.isoformat(), 'category': 'UTILITIES'}
+        resp = self.client.get(reverse('expense-summary'), params)
+        self.assertEqual(resp.data['total_expenses'], Decimal('31.00'))
+        self.assertEqual(resp.data['transaction_count'], 1)
+
+    def test_partial_range_falls_back_to_raw_rows(self):
+        day = self.month.replace(day=2) if timezone.now().date().day > 1 else self.month
+        Expense.objects.create(user=self.user, amount='10.00', category='GROCERIES', date=day)
+        ExpenseRollup.objects.update(total=Decimal('99.00'))
+        params = {'start_date': self.month.isoformat(), 'min_amount': '1'}
+        resp = self.client.get(reverse('expense-summary'), params)
+        self.assertEqual(resp.data['total_expenses'], Decimal('10.00'))
+
+
+class ExpenseBulkAPITest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='bulk@example.com', name='Bulk', password='securepass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('expense-bulk')
+        self.today = timezone.now().date()
+
+    def _payload(self, n, **overrides):
+        return [
+            {'amount': f'{i + 1}.00', 'category': 'GROCERIES',
+             'date': self.today.isoformat(), 'description': f'Item {i}', **overrides}
+            for i in range(n)
+        ]
+
+    def test_bulk_create(self):
+        with self.assertNumQueries(7):
+            resp = self.client.post(self.url, self._payload(50), format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(resp.data), 50)
+        self.assertTrue(all(item['id'] for item in resp.data))
+        rollup = ExpenseRollup.objects.get(user=self.user, category='GROCERIES')
+        self.assertEqual((rollup.count, rollup.total), (50, Decimal('1275.00')))
+
+    def test_bulk_create_reports_errors_per_item(self):
+        payload = self._payload(3)
+        payload[1]['amount'] = '-5'
+        resp = self.client.post(self.url, payload, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data[0], {})
+        self.assertIn('amount', resp.data[1])
+        self.assertFalse(Expense.objects.filter(user=self.user).exists())
+
+    def test_bulk_create_limit(self):
+        with self.settings(EXPENSE_BULK_MAX_ITEMS=2):
+            resp = self.client.post(self.url, self._payload(3), format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update(self):
+        created = self.client.post(self.url, self._payload(2), format='json').data
+        other = User.objects.create_user(email='other@example.com', name='Other', password='securepass123')
+        foreign = Expense.objects.create(user=other, amount='1.00', category='GROCERIES', date=self.today)
+
+        resp = self.client.patch(self.url, [
+            {'id': created[0]['id'], 'category': 'UTILITIES'},
+            {'id': foreign.id, 'amount': '2.00'},
+        ], format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', resp.data[1])
+
+        resp = self.client.patch(self.url, [
+            {'id': created[0]['id'], 'category': 'UTILITIES'},
+            {'id': created[1]['id'], 'amount': '9.99'},
+        ], format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data[0]['category'], 'UTILITIES')
+        self.assertEqual(Expense.objects.get(pk=created[1]['id']).amount, Decimal('9.99'))
+        totals = dict(
+            ExpenseRollup.objects.filter(user=self.user).values_list('category', 'total')
+        )
+        self.assertEqual(totals, {'GROCERIES': Decimal('9.99'), 'UTILITIES': Decimal('1.00')})
+
+    def test_bulk_delete(self):
+        created = self.client.post(self.url, self._payload(3), format='json').data
+        ids = [item['id'] for item in created[:2]]
+        resp = self.client.delete(self.url, {'ids': ids + [999999]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data, {'deleted': 2, 'not_found': [999999]})
+        rollup = ExpenseRollup.objects.get(user=self.user, category='GROCERIES')
+        self.assertEqual((rollup.count, rollup.total), (1, Decimal('3.00')))
+
+
+class ExpenseExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='export@example.com', name='Exporter', password='securepass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('expense-export')
+        today = timezone.now().date()
+        self.older = Expense.objects.create(
+            user=self.user, amount='5.5', category='UTILITIES',
+            date=today - timedelta(days=1), description='Power, "monthly"')
+        self.newer = Expense.objects.create(
+            user=self.user, amount='12.00', category='GROCERIES', date=today)
+
+    def _body(self, resp):
+        return b''.join(resp.streaming_content).decode()
+
+    def test_csv_export(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(self._body(resp))))
+        self.assertEqual(rows[0], ['id', 'amount', 'category', 'date', 'description'])
+        self.assertEqual(rows[1][0], str(self.newer.id))
+        self.assertEqual(rows[2][1:], ['5.50', 'UTILITIES', self.older.date.isoformat(), 'Power, "monthly"'])
+
+    def test_csv_errors_are_json(self):
+        resp = APIClient().get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(resp['Content-Type'], 'application/json')
+        self.assertIn('detail', resp.json())
+
+    def test_ndjson_export_matches_serializer(self):
+        resp = self.client.get(self.url, {'format': 'ndjson', 'category': 'UTILITIES'})
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = [json.loads(line) for line in self._body(resp).splitlines()]
+        self.assertEqual(lines, [dict(ExpenseSerializer(Expense.objects.get(pk=self.older.pk)).data)])
+
+    async def test_export_streams_under_asgi(self):
+        login = await sync_to_async(APIClient().post)(
+            reverse('login'), {'email': 'export@example.com', 'password': 'securepass123'}
+        )
+        resp = await self.async_client.get(
+            self.url, {'format': 'ndjson'}, headers={'Authorization': f"Bearer {login.data['access']}"}
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        self.assertTrue(resp.is_async)
+        body = b''.join([chunk async for chunk in resp])
+        lines = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([line['id'] for line in lines], [self.newer.id, self.older.id])
+
+    def test_export_streams_in_chunks(self):
+        self.assertEqual(
+            len(list(exports.stream_csv(Expense.objects.filter(user=self.user), chunk_size=1))),
+            3,
+        )
+
+
+class ExpenseImportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='import@example.com', name='Importer', password='securepass123')
+        self.today = timezone.now().date()
+        self.csv = (
+            'Amount,Category,Date,Description\n'
+            f'10.00,groceries,{self.today},Market\n'
+            f'0,UTILITIES,{self.today},Zero\n'
+            f'5.25,UTILITIES,{self.today - timedelta(days=40)},\n'
+            f'3.00,TRAVEL,{self.today + timedelta(days=1)},Bad\n'
+            f'1.999,GROCERIES,{self.today},Too precise\n'
+        )
+
+    def test_import_batches_and_rejects(self):
+        rejects = []
+        result = import_expenses(
+            self.user, io.StringIO(self.csv), batch_size=2,
+            on_reject=lambda line, errors: rejects.append((line, errors)),
+        )
+        self.assertEqual((result.imported, result.rejected), (2, 3))
+        self.assertEqual([line for line, _ in rejects], [3, 5, 6])
+        self.assertEqual(set(rejects[1][1]), {'category', 'date'})
+        self.assertEqual(
+            sorted(Expense.objects.filter(user=self.user).values_list('category', flat=True)),
+            ['GROCERIES', 'UTILITIES'],
+        )
+        self.assertEqual(ExpenseRollup.objects.filter(user=self.user).count(), 2)
+
+    def test_copy_import(self):
+        if not can_copy():
+            self.skipTest('COPY needs PostgreSQL')
+        result = import_expenses(self.user, io.StringIO(self.csv), batch_size=2, use_copy=True)
+        self.assertEqual((result.imported, result.rejected), (2, 3))
+        self.assertEqual(
+            sorted(Expense.objects.filter(user=self.user).values_list('category', 'description')),
+            [('GROCERIES', 'Market'), ('UTILITIES', '')],
+        )
+        self.assertEqual(ExpenseRollup.objects.filter(user=self.user).count(), 2)
+
+    def test_missing_columns(self):
+        with self.assertRaises(ImportFormatError):
+            import_expenses(self.user, io.StringIO('amount,date\n1.00,2025-01-01\n'))
+
+    def test_upload_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        upload = SimpleUploadedFile('history.csv', self.csv.encode(), content_type='text/csv')
+        resp = client.post(reverse('expense-import-csv'), {'file': upload}, format='multipart')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((resp.data['imported'], resp.data['rejected']), (2, 3))
+        self.assertEqual(resp.data['rejects'][0]['line'], 3)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as fh:
+            fh.write(self.csv)
+        self.addCleanup(os.remove, fh.name)
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_expenses', fh.name, user=self.user.email, stdout=out, stderr=err)
+        self.assertIn('Imported 2 expenses, rejected 3.', out.getvalue())
+        self.assertIn('line 5:', err.getvalue())
+
+
+class ExpenseFastSerializerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='fast@example.com', name='Fast', password='securepass123')
+        for amount in ['0.10', '12', '999999.99']:
+            Expense.objects.create(user=self.user, amount=amount, category='UTILITIES',
+                                   date=timezone.now().date(), description='Ünïcode "quoted"')
+
+    def test_output_is_byte_identical(self):
+        qs = Expense.objects.filter(user=self.user)
+        slow = JSONRenderer().render(ExpenseSerializer(qs, many=True).data)
+        fast = JSONRenderer().render(ExpenseFastSerializer(qs.values(*ExpenseFastSerializer.fields)).data)
+        self.assertEqual(slow, fast)
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command('bench_serializers', rows=50, repeat=1, stdout=out)
+        self.assertIn('output identical', out.getvalue())
+
+        original = ExpenseFastSerializer.data.fget
+
+        def drifted(serializer):
+            return [{**row, 'amount': f"{row['amount']}0"} for row in original(serializer)]
+
+        with mock.patch.object(ExpenseFastSerializer, 'data', property(drifted)):
+            with self.assertRaises(CommandError):
+                call_command('bench_serializers', rows=5, repeat=1, stdout=io.StringIO())
+
+
+class ExpenseQueryShapeTest(TestCase):
+    """
+    Guards the per-action projections: no user join, only emitted columns.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(email='shape@example.com', name='Shape', password='securepass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.expense = Expense.objects.create(
+            user=self.user, amount='4.00', category='GROCERIES', date=timezone.now().date())
+
+    def _queries(self, url, params=None, count=1):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, params)
+            if resp.streaming:
+                b''.join(resp.streaming_content)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(ctx.captured_queries), count, ctx.captured_queries)
+        return [query['sql'] for query in ctx.captured_queries]
+
+    def _selected_columns(self, sql):
+        select = sql.split(' FROM ', 1)[0]
+        return set(re.findall(r'"expenses_expense"\."(\w+)"', select))
+
+    def test_list_selects_only_emitted_columns(self):
+        sql, = self._queries(reverse('expense-list'))
+        self.assertNotIn('users_customuser', sql)
+        self.assertEqual(self._selected_columns(sql), set(ExpenseFastSerializer.fields))
+
+    def test_retrieve_selects_only_emitted_columns(self):
+        sql, = self._queries(reverse('expense-detail', args=[self.expense.pk]))
+        self.assertNotIn('users_customuser', sql)
+        self.assertEqual(self._selected_columns(sql), set(ExpenseFastSerializer.fields))
+
+    def test_export_selects_only_emitted_columns(self):
+        sql, = self._queries(reverse('expense-export'))
+        self.assertEqual(self._selected_columns(sql), set(ExpenseFastSerializer.fields))
+
+    def test_summary_is_a_single_join_free_query(self):
+        for params in ({}, {'min_amount': '1'}):
+            sql, = self._queries(reverse('expense-summary'), params)
+            self.assertNotIn('users_customuser', sql)
+
+
+class ExpenseTimeseriesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='series@example.com', name='Series', password='securepass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('expense-timeseries')
+        self.month = (timezone.now().date().replace(day=1) - timedelta(days=1)).replace(day=1)
+        self.prev = (self.month - timedelta(days=1)).replace(day=1)
+        self.before = (self.prev - timedelta(days=1)).replace(day=1)
+        Expense.objects.create(user=self.user, amount='10.00', category='GROCERIES', date=self.before)
+        Expense.objects.create(user=self.user, amount='2.50', category='UTILITIES', date=self.month)
+        Expense.objects.create(user=self.user, amount='1.50', category='UTILITIES', date=self.month + timedelta(days=3))
+
+    def test_monthly_buckets_filled(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['results'], [
+            {'period': self.before.isoformat(), 'total': '10.00', 'count': 1},
+            {'period': self.prev.isoformat(), 'total': '0.00', 'count': 0},
+            {'period': self.month.isoformat(), 'total': '4.00', 'count': 2},
+        ])
+
+    def test_daily_buckets_by_category_honor_filters(self):
+        params = {
+            'interval': 'day', 'group_by': 'category', 'category': 'UTILITIES',
+            'start_date': self.month.isoformat(),
+            'end_date': (self.month + timedelta(days=3)).isoformat(),
+        }
+        results = self.client.get(self.url, params).data['results']
+        self.assertEqual(len(results), 4)
+        self.assertEqual({row['category'] for row in results}, {'UTILITIES'})
+        self.assertEqual([row['count'] for row in results], [1, 0, 0, 1])
+
+    def test_weekly_buckets_start_on_monday(self):
+        results = self.client.get(self.url, {'interval': 'week', 'min_amount': '2'}).data['results']
+        self.assertTrue(all(date.fromisoformat(row['period']).weekday() == 0 for row in results))
+        self.assertEqual(sum(row['count'] for row in results), 2)
+
+    def test_monthly_rollup_path_matches_raw(self):
+        by_rollup = self.client.get(self.url, {'group_by': 'category'}).data['results']
+        by_rows = self.client.get(self.url, {'group_by': 'category', 'min_amount': '0.01'}).data['results']
+        self.assertEqual(by_rollup, by_rows)
+
+    def test_invalid_interval(self):
+        resp = self.client.get(self.url, {'interval': 'hour'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExpenseResponseCacheTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='cache@example.com', name='Cache', password='securepass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Expense.objects.create(user=self.user, amount='3.00', category='GROCERIES', date=timezone.now().date())
+
+    def test_summary_cached_until_write(self):
+        url = reverse('expense-summary')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            resp = self.client.get(url)
+        self.assertEqual(resp['X-Cache'], 'HIT')
+        self.assertEqual(resp.data['transaction_count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Expense.objects.create(user=self.user, amount='4.00', category='GROCERIES', date=timezone.now().date())
+        resp = self.client.get(url)
+        self.assertEqual(resp['X-Cache'], 'MISS')
+        self.assertEqual(resp.data['transaction_count'], 2)
+
+    def test_filters_are_normalized_into_the_key(self):
+        url = reverse('expense-summary')
+        self.client.get(url, {'category': 'GROCERIES', 'min_amount': '1'})
+        resp = self.client.get(url, {'min_amount': '1.0', 'category': 'GROCERIES'})
+        self.assertEqual(resp['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get(url, {'category': 'UTILITIES'})['X-Cache'], 'MISS')
+
+    def test_list_pages_cached_per_cursor(self):
+        url = reverse('expense-list')
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get(url, {'page_size': 1})['X-Cache'], 'MISS')
+
+    def test_metrics_endpoint_requires_admin(self):
+        url = reverse('expense-cache-metrics')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        before = cache_metrics(['summary'])['summary']
+        self.client.get(reverse('expense-summary'))
+        self.client.get(reverse('expense-summary'))
+        admin = User.objects.create_user(email='ops@example.com', name='Ops', password='securepass123', role='Admin')
+        self.client.force_authenticate(admin)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['summary']['hits'], before['hits'] + 1)
+        self.assertEqual(resp.data['summary']['misses'], before['misses'] + 1)
+
+
+class BenchmarkSuiteTest(TestCase):
+    def test_seed_command_skews_and_keeps_rollups_consistent(self):
+        call_command('seed_expenses', users=2, expenses=200, stdout=io.StringIO())
+        users = User.objects.filter(email__startswith='bench-')
+        self.assertEqual(users.count(), 2)
+        self.assertEqual(Expense.objects.filter(user__in=users).count(), 400)
+
+        counts = {row['category']: row['n'] for row in
+                  Expense.objects.values('category').annotate(n=Count('id'))}
+        self.assertGreater(counts['GROCERIES'], counts['UTILITIES'])
+        recent = Expense.objects.filter(date__gte=timezone.now().date() - timedelta(days=180)).count()
+        self.assertGreater(recent, 200)
+
+        user = users.first()
+        self.assertEqual(
+            ExpenseRollup.objects.filter(user=user).aggregate(total=Sum('total'))['total'],
+            Expense.objects.filter(user=user).aggregate(total=Sum('amount'))['total'],
+        )
+        with self.assertRaises(CommandError):
+            call_command('seed_expenses', users=1, expenses=1, stdout=io.StringIO())
+        call_command('seed_expenses', users=1, expenses=1, reset=True, stdout=io.StringIO())
+
+    def test_compare_results_flags_regressions(self):
+        base = [{'name': 'list', 'p50_ms': 10, 'p95_ms': 20, 'queries': 2, 'peak_kib': 100}]
+        same = [dict(base[0], p50_ms=11.5)]
+        worse = [dict(base[0], p95_ms=30, queries=3)]
+        noisy = [{'name': 'login', 'p50_ms': 1.5, 'p95_ms': 2, 'queries': 1, 'peak_kib': 10}]
+        self.assertEqual(benchmarks.compare_results(noisy, [dict(noisy[0], p50_ms=1)]), [])
+        self.assertEqual(benchmarks.compare_results(same, base, 0.2), [])
+        self.assertEqual(len(benchmarks.compare_results(worse, base, 0.2)), 2)
+        self.assertEqual(benchmarks.percentile([5, 1, 3, 2, 4], 50), 3)
+
+    def test_bench_command_saves_and_compares(self):
+        call_command('seed_expenses', users=1, expenses=50, stdout=io.StringIO())
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'baseline.json')
+            out = io.StringIO()
+            call_command('bench_api', endpoints='list,summary,signup,login',
+                         iterations=2, warmup=0, save=path, stdout=out)
+            self.assertIn('summary', out.getvalue())
+            with open(path) as fh:
+                saved = json.load(fh)
+            self.assertEqual([row['name'] for row in saved['results']],
+                             ['list', 'summary', 'signup', 'login'])
+            self.assertTrue(all(row['status'] in (200, 201) for row in saved['results']))
+            self.assertFalse(User.objects.filter(email__startswith=benchmarks.SIGNUP_EMAIL_PREFIX).exists())
+
+            for row in saved['results']:
+                row['queries'] = 0
+            with open(path, 'w') as fh:
+                json.dump(saved, fh)
+            with self.assertRaises(CommandError):
+                call_command('bench_api', endpoints='list', iterations=1, warmup=0, cold=True,
+                             baseline=path, stdout=io.StringIO(), stderr=io.StringIO())
+
+
+class PerformanceMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='perf@example.com', name='Perf', password='securepass123')
+        Expense.objects.create(user=self.user, amount='4.00', category='GROCERIES',
+                               date=timezone.now().date())
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_breakdown(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse('expense-list'), {'page_size': 1})
+        timing = resp['Server-Timing']
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertRegex(timing, r'serialize;dur=[\d.]+')
+        self.assertRegex(timing, r'total;dur=[\d.]+')
+
+    def test_metrics_histograms_per_view(self):
+        url = reverse('metrics')
+        pattern = re.compile(
+            r'http_request_duration_seconds_count\{view="expense-summary",method="GET",status="200"\} (\d+)'
+        )
+        match = pattern.search(self.client.get(url).content.decode())
+        before = int(match.group(1)) if match else 0
+        self.client.get(reverse('expense-summary'))
+        body = self.client.get(url).content.decode()
+        self.assertEqual(int(pattern.search(body).group(1)), before + 1)
+        self.assertIn('# TYPE http_request_db_queries histogram', body)
+        self.assertIn('http_response_size_bytes_bucket{view="expense-summary"', body)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        resp = self.client.get(url, HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_slow_requests_are_logged(self):
+        with override_settings(SLOW_REQUEST_THRESHOLD_MS=0), \
+                self.assertLogs('expense_tracker.performance', 'WARNING') as logs:
+            self.client.get(reverse('expense-summary'))
+        self.assertIn('(expense-summary) 200', logs.output[0])
+        with override_settings(SLOW_REQUEST_THRESHOLD_MS=60000), \
+                self.assertNoLogs('expense_tracker.performance', 'WARNING'):
+            self.client.get(reverse('expense-summary'))
+
+
+class AsyncExpenseViewsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='async@example.com', name='Async', password='securepass123')
+        today = timezone.now().date()
+        for amount, category in [('10.00', 'GROCERIES'), ('2.50', 'UTILITIES'), ('7.25', 'GROCERIES')]:
+            Expense.objects.create(user=self.user, amount=amount, category=category, date=today)
+        resp = APIClient().post(reverse('login'), {'email': 'async@example.com', 'password': 'securepass123'})
+        self.auth = {'Authorization': f"Bearer {resp.data['access']}"}
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.auth['Authorization'])
+        cache.clear()
+
+    async def test_summary_matches_and_shares_cache(self):
+        sync = await sync_to_async(self.client.get)(reverse('expense-summary'), {'category': 'GROCERIES'})
+        resp = await self.async_client.get(
+            reverse('async-expense-summary'), {'category': 'GROCERIES'}, headers=self.auth
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp['X-Cache'], 'HIT')
+        self.assertEqual(resp.content, sync.content)
+
+        resp = await self.async_client.get(
+            reverse('async-expense-summary'), {'min_amount': '5'}, headers=self.auth
+        )
+        self.assertEqual(resp['X-Cache'], 'MISS')
+        self.assertEqual(json.loads(resp.content)['transaction_count'], 2)
+        # The async ORM's queries are still charged to the request.
+        self.assertRegex(resp['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+    async def test_list_pages_like_the_sync_view(self):
+        sync = await sync_to_async(self.client.get)(reverse('expense-list'), {'page_size': 2})
+        resp = await self.async_client.get(reverse('async-expense-list'), {'page_size': 2}, headers=self.auth)
+        page = json.loads(resp.content)
+        self.assertEqual(page['results'], json.loads(sync.content)['results'])
+        self.assertIn(reverse('async-expense-list'), page['next'])
+
+        resp = await self.async_client.get(page['next'], headers=self.auth)
+        self.assertEqual(len(json.loads(resp.content)['results']), 1)
+
+    async def test_auth_and_permissions(self):
+        url = reverse('async-expense-summary')
+        resp = await self.async_client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('WWW-Authenticate', resp)
+        resp = await self.async_client.get(url, headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        await User.objects.filter(pk=self.user.pk).aupdate(role='Admin')
+        cache.clear()
+        resp = await self.async_client.get(url, headers=self.auth)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_invalid_filters(self):
+        resp = await self.async_client.get(
+            reverse('async-expense-summary'), {'min_amount': 'abc'}, headers=self.auth
+        )
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('min_amount', json.loads(resp.content))
+
+    async def test_chart_without_expenses(self):
+        await Expense.objects.filter(user=self.user).adelete()
+        resp = await self.async_client.get(
+            reverse('async-expense-reports-spending-chart'), headers=self.auth
+        )
+        self.assertEqual(json.loads(resp.content), {'chart': None})
+
+    async def test_chart_formats_and_options(self):
+        url = reverse('async-expense-reports-spending-chart')
+        resp = await self.async_client.get(url, {'format': 'data'}, headers=self.auth)
+        sync = await sync_to_async(self.client.get)(
+            reverse('expense-reports-spending-chart'), {'format': 'data'}
+        )
+        self.assertEqual(sync['X-Cache'], 'HIT')
+        self.assertEqual(resp.content, sync.content)
+
+        resp = await self.async_client.get(url, {'dpi': '1000'}, headers=self.auth)
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('dpi', json.loads(resp.content))
+        resp = await self.async_client.get(url, {'format': 'gif'}, headers=self.auth)
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+        params = {'format': 'svg', 'width': '4', 'height': '3'}
+        deadline = time.monotonic() + 30
+        resp = await self.async_client.get(url, params, headers=self.auth)
+        while resp.status_code == status.HTTP_202_ACCEPTED and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+            resp = await self.async_client.get(url, params, headers=self.auth)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp['Content-Type'], 'image/svg+xml')
+        self.assertIn(b'width="288pt"', resp.content)
+
+    def test_concurrency_harness(self):
+        from django.core.asgi import get_asgi_application
+        app = get_asgi_application()
+        row = async_to_sync(benchmarks.run_concurrent)(
+            lambda: benchmarks.asgi_get(app, reverse('async-expense-summary'),
+                                        headers=[('Host', 'testserver')]),
+            4, 8,
+        )
+        self.assertEqual(row['statuses'], [401])
+        self.assertEqual(row['requests'], 8)
+        self.assertEqual(benchmarks.best_within([row], row['p99_ms']), row)
+        self.assertIsNone(benchmarks.best_within([row], -1))
+
+
+class SpendingChartFormatTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='charts@example.com', name='Charts', password='securepass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('expense-reports-spending-chart')
+        for amount, category in [('1234.50', 'GROCERIES'), ('456.70', 'UTILITIES'), ('89.10', 'ENTERTAINMENT')]:
+            Expense.objects.create(user=self.user, amount=amount, category=category, date=timezone.now().date())
+        self.series = (
+            [row['category'] for row in self._series()],
+            [float(row['total']) for row in self._series()],
+        )
+        cache.clear()
+
+    def _series(self):
+        return [{'category': 'GROCERIES', 'total': '1234.50'},
+                {'category': 'UTILITIES', 'total': '456.70'},
+                {'category': 'ENTERTAINMENT', 'total': '89.10'}]
+
+    def _poll(self, params):
+        resp = self.client.get(self.url, params)
+        deadline = time.monotonic() + 60
+        while resp.status_code == status.HTTP_202_ACCEPTED and time.monotonic() < deadline:
+            self.assertTrue(resp['Content-Type'].startswith('application/json'))
+            time.sleep(0.1)
+            resp = self.client.get(self.url, params)
+        return resp
+
+    def test_bytes_sent_per_format(self):
+        png = self._poll({'format': 'png'})
+        self.assertEqual(png['Content-Type'], 'image/png')
+        self.assertTrue(png.content.startswith(b'\x89PNG'))
+
+        svg = self._poll({'format': 'svg'})
+        self.assertEqual(svg['Content-Type'], 'image/svg+xml')
+        self.assertIn(b'<svg', svg.content)
+
+        data = self.client.get(self.url, {'format': 'data'})
+        self.assertEqual(json.loads(data.content), {'results': self._series()})
+
+        wrapped = self._poll({})
+        self.assertEqual(base64.b64decode(wrapped.data['chart']), png.content)
+
+        sizes = [len(r.content) for r in (data, svg, png, wrapped)]
+        self.assertEqual(sizes, sorted(sizes))
+        # Base64 inflates the PNG by a third.
+        self.assertGreater(len(wrapped.content), len(png.content) * 4 // 3)
+
+    def test_render_output_per_format(self):
+        png = render_spending_chart(*self.series, fmt='png', width=4, height=3, dpi=100)
+        self.assertTrue(png.startswith(b'\x89PNG\r\n\x1a\n'))
+        self.assertEqual(png[16:24], (400).to_bytes(4, 'big') + (300).to_bytes(4, 'big'))
+        svg = render_spending_chart(*self.series, fmt='svg')
+        self.assertTrue(svg.lstrip().startswith(b'<?xml'))
+        self.assertIn(b'<svg', svg)
+        self.assertEqual(svg, render_spending_chart(*self.series, fmt='svg'))
+
+    def test_data_format_skips_the_render_pool(self):
+        with mock.patch('expenses.reports.get_render_executor') as executor:
+            resp = self.client.get(self.url, {'format': 'data'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp['Content-Type'], 'application/json')
+        executor.assert_not_called()
+
+    def test_size_and_dpi(self):
+        small = self._poll({'format': 'png', 'width': 4, 'height': 3, 'dpi': 100})
+        self.assertEqual(small.status_code, status.HTTP_200_OK)
+        # PNG IHDR: width and height in pixels.
+        self.assertEqual(small.content[16:24], (400).to_bytes(4, 'big') + (300).to_bytes(4, 'big'))
+
+        resp = self.client.get(self.url, {'format': 'png', 'dpi': 1000})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(resp['Content-Type'].startswith('application/json'))
+        self.assertIn('dpi', json.loads(resp.content))
+        resp = self.client.get(self.url, {'format': 'png', 'width': 20, 'dpi': 300})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_nothing_to_plot(self):
+        Expense.objects.filter(user=self.user).delete()
+        cache.clear()
+        self.assertEqual(self.client.get(self.url, {'format': 'png'}).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(json.loads(self.client.get(self.url, {'format': 'data'}).content), {'results': []})
+
+
+class StartupImportTest(TestCase):
+    def test_worker_startup_skips_matplotlib(self):
+        times = benchmarks.import_times()
+        self.assertIn('expenses.views', times)
+        self.assertEqual([m for m in times if m.split('.')[0] == 'matplotlib'], [])
+
+    def test_first_render_loads_agg(self):
+        times = benchmarks.import_times(
+            benchmarks.STARTUP_CODE + '; '
+            'from expenses.rendering import render_spending_chart; '
+            'render_spending_chart(["GROCERIES"], [1.0]); '
+            'import matplotlib; assert matplotlib.get_backend().lower() == "agg"'
+        )
+        self.assertIn('matplotlib.figure', times)
+        self.assertNotIn('matplotlib.pyplot', times)
+
+
+class ExpenseSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='search@example.com', name='Search', password='securepass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        today = timezone.now().date()
+        self.rent = Expense.objects.create(user=self.user, amount='1200.00', category='UTILITIES',
+                                           date=today - timedelta(days=3), description='Monthly rent payments')
+        self.garage = Expense.objects.create(user=self.user, amount='80.00', category='UTILITIES', date=today,
+                                             description='Garage rent plus a long list of unrelated words here')
+        self.coffee = Expense.objects.create(user=self.user, amount='4.50', category='ENTERTAINMENT', date=today,
+                                             description='Coffee at Starbucks')
+        other = User.objects.create_user(email='other-search@example.com', name='Other', password='securepass123')
+        Expense.objects.create(user=other, amount='900.00', category='UTILITIES', date=today, description='rent')
+        cache.clear()
+
+    def _ids(self, params, url=None):
+        resp = self.client.get(url or reverse('expense-list'), params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        return [row['id'] for row in resp.data['results']]
+
+    def test_q_filters_list_with_stemming_and_prefixes(self):
+        self.assertEqual(self._ids({'q': 'rent'}), [self.garage.id, self.rent.id])
+        self.assertEqual(self._ids({'q': 'payment'}), [self.rent.id])
+        self.assertEqual(self._ids({'q': 'starb'}), [self.coffee.id])
+        self.assertEqual(self._ids({'q': 'rent', 'min_amount': '100'}), [self.rent.id])
+        self.assertEqual(self._ids({'q': '!!'}), [])
+
+    def test_search_ranks_best_match_first(self):
+        # BM25 needs the term to be rare in the table to score it.
+        Expense.objects.bulk_create(
+            Expense(user=self.user, amount='10.00', category='GROCERIES', date=timezone.now().date(),
+                    description=f'Groceries week {i}')
+            for i in range(6)
+        )
+        resp = self.client.get(reverse('expense-search'), {'q': 'rent'})
+        results = resp.data['results']
+        self.assertEqual([row['id'] for row in results], [self.rent.id, self.garage.id])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+        self.assertEqual(results[0]['amount'], '1200.00')
+
+        self.assertEqual(self._ids({'q': 'rent', 'category': 'ENTERTAINMENT'}, reverse('expense-search')), [])
+        self.assertEqual(self._ids({'q': 'rent', 'limit': 1}, reverse('expense-search')), [self.rent.id])
+        self.assertEqual(self.client.get(reverse('expense-search')).status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.get(reverse('expense-search'), {'q': 'rent', 'limit': 1000})
+        self.assertIn('limit', resp.data)
+
+    def test_index_follows_writes(self):
+        self.coffee.description = 'Rent top-up'
+        self.coffee.save()
+        self.rent.delete()
+        import_expenses(self.user, io.StringIO(
+            f'amount,category,date,description\n5.00,GROCERIES,{timezone.now().date()},Rent snacks\n'
+        ), use_copy=False)
+        cache.clear()
+        self.assertEqual(len(self._ids({'q': 'rent'})), 3)
+        self.assertEqual(self._ids({'q': 'coffee'}), [])
+
+    async def test_async_views_search(self):
+        login = await sync_to_async(APIClient().post)(
+            reverse('login'), {'email': 'search@example.com', 'password': 'securepass123'}
+        )
+        headers = {'Authorization': f"Bearer {login.data['access']}"}
+        resp = await self.async_client.get(reverse('async-expense-list'), {'q': 'rent'}, headers=headers)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in json.loads(resp.content)['results']],
+                         [self.garage.id, self.rent.id])
+        resp = await self.async_client.get(reverse('async-expense-summary'), {'q': 'rent'}, headers=headers)
+        self.assertEqual(json.loads(resp.content)['transaction_count'], 2)
+
+    def test_summary_with_q_reads_raw_rows(self):
+        resp = self.client.get(reverse('expense-summary'), {'q': 'rent'})
+        self.assertEqual(resp.data['transaction_count'], 2)
+        self.assertEqual(resp.data['total_expenses'], Decimal('1280.00'))
+
+    def test_match_is_index_driven(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite FTS5 plan')
+        qs = Expense.objects.filter(user=self.user)
+        from .search import filter_search
+        sql, params = filter_search(qs, 'rent').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('VIRTUAL TABLE INDEX', plan)
+
+
+class ExpenseQueryPlanTest(TestCase):
+    """
+    EXPLAINs what the list and summary endpoints run for every filter
+    combination on a seeded, analyzed table.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_expenses', users=3, expenses=400, prefix='plan', stdout=io.StringIO())
+        cls.user = User.objects.get(email=benchmarks.seed_email('plan', 0))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _check(self, url, params, index_only=False):
+        cache.clear()
+        queries = query_plans.capture_expense_queries(lambda: self.client.get(url, params))
+        for sql in queries:
+            self.assertEqual(query_plans.plan_problems(sql, index_only=index_only), [], sql)
+        return queries
+
+    def test_list_pages_follow_an_index(self):
+        for params in query_plans.filter_combinations():
+            with self.subTest(**params):
+                self.assertEqual(len(self._check(reverse('expense-list'), params)), 1)
+
+    def test_raw_summaries_are_index_only(self):
+        for params in query_plans.filter_combinations():
+            with self.subTest(**params):
+                queries = self._check(reverse('expense-summary'), params, index_only=True)
+                raw = 'min_amount' in params or 'max_amount' in params
+                self.assertEqual(len(queries), int(raw))
+
+    def test_harness_reports_unindexed_shapes(self):
+        sql, = query_plans.capture_expense_queries(
+            lambda: list(Expense.objects.filter(description='x').order_by('amount').values('amount')))
+        problems = query_plans.plan_problems(sql)
+        self.assertTrue(any(p.startswith('table scan') for p in problems), problems)
+        self.assertTrue(any(p.startswith('sort') for p in problems), problems)
+
+
+class ExpensePartitionTest(TestCase):
+    def test_month_arithmetic_and_names(self):
+        self.assertEqual(partitions.add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(partitions.add_months(date(2024, 1, 1), -1), date(2023, 12, 1))
+        self.assertEqual(
+            list(partitions.months_between(date(2024, 11, 15), date(2025, 1, 2))),
+            [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1)],
+        )
+        name = partitions.partition_name(date(2025, 2, 1))
+        self.assertEqual(name, 'expenses_expense_p202502')
+        self.assertEqual(partitions.partition_month(name), date(2025, 2, 1))
+
+    def test_create_detach_and_archive(self):
+        if not partitions.is_supported():
+            self.skipTest('Partitioning needs PostgreSQL')
+        user = User.objects.create_user(email='archive@example.com', name='Archive', password='securepass123')
+        this_month = partitions.month_start(timezone.now().date())
+        old_month = partitions.add_months(this_month, -6)
+        expense = Expense.objects.create(user=user, amount='7.00', category='GROCERIES', date=old_month)
+        partitions.partition(months_ahead=1)
+        self.assertTrue(partitions.is_partitioned())
+
+        name = partitions.partition_name(old_month)
+        self.assertIn(name, [partition for partition, _, _ in partitions.partitions()])
+        ahead = partitions.add_months(this_month, 2)
+        self.assertEqual(partitions.create_partitions(this_month, ahead), [partitions.partition_name(ahead)])
+
+        self.assertEqual(partitions.detach_partition(name), 1)
+        self.assertFalse(Expense.objects.filter(pk=expense.pk).exists())
+        self.assertEqual(ExpenseRollup.objects.get(user=user, month=old_month, category='GROCERIES').count, 0)
+        self.assertTrue(ExpenseTombstone.objects.filter(user=user, expense_id=expense.pk).exists())
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            path = os.path.join(archive_dir, f'{name}.csv.gz')
+            partitions.archive_partition(name, path)
+            with gzip.open(path, 'rt', newline='') as archive:
+                rows = list(csv.DictReader(archive))
+        self.assertEqual([row['id'] for row in rows], [str(expense.pk)])
+        self.assertNotIn(name, [partition for partition, _, _ in partitions.partitions()])
+
+    def test_command_requires_postgresql(self):
+        if partitions.is_supported():
+            self.skipTest('PostgreSQL backend')
+        self.assertFalse(partitions.is_partitioned())
+        with self.assertRaisesMessage(CommandError, 'requires PostgreSQL'):
+            call_command('expense_partitions', 'list')
+
+
+@override_settings(EXPENSE_SYNC_SETTLE_SECONDS=0)
+class ExpenseSyncTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='sync@example.com', name='Sync', password='securepass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        today = timezone.now().date()
+        self.expenses = [
+            Expense.objects.create(user=self.user, amount=f'{i + 1}.00', category='GROCERIES', date=today)
+            for i in range(3)
+        ]
+
+    def _sync(self, since=None, **params):
+        if since:
+            params['since'] = since
+        resp = self.client.get(reverse('expense-changes'), params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        return resp.data
+
+    def test_initial_then_incremental_sync(self):
+        first = self._sync()
+        self.assertEqual([row['id'] for row in first['changed']], [e.id for e in self.expenses])
+        self.assertEqual(first['deleted'], [])
+        self.assertFalse(first['has_more'])
+        self.assertIn('updated_at', first['changed'][0])
+
+        self.assertEqual(self._sync(first['since'])['changed'], [])
+
+        edited, removed, _ = self.expenses
+        removed_id = removed.id
+        edited.amount = '9.99'
+        edited.save()
+        removed.delete()
+        created = Expense.objects.create(user=self.user, amount='5.00', category='UTILITIES',
+                                         date=timezone.now().date())
+        self.client.delete(reverse('expense-bulk'), {'ids': [created.id]}, format='json')
+
+        second = self._sync(first['since'])
+        self.assertEqual([row['id'] for row in second['changed']], [edited.id])
+        self.assertEqual(second['changed'][0]['amount'], '9.99')
+        self.assertEqual(second['deleted'], [removed_id, created.id])
+        self.assertEqual(self._sync(second['since'])['deleted'], [])
+
+    def test_pages_through_rows_sharing_a_timestamp(self):
+        moment = timezone.now()
+        Expense.objects.filter(user=self.user).update(updated_at=moment)
+        seen, since = [], None
+        for _ in range(5):
+            page = self._sync(since, limit=2)
+            seen += [row['id'] for row in page['changed']]
+            since = page['since']
+            if not page['has_more']:
+                break
+        self.assertEqual(seen, [e.id for e in self.expenses])
+
+    @override_settings(EXPENSE_SYNC_SETTLE_SECONDS=60)
+    def test_unsettled_changes_wait_for_the_next_sync(self):
+        self.assertEqual(self._sync()['changed'], [])
+
+    def test_invalid_and_expired_watermarks(self):
+        resp = self.client.get(reverse('expense-changes'), {'since': 'not-a-token'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        old = timezone.now() - timedelta(days=365)
+        since = sync.encode_watermark(sync.Position(old, 0), sync.Position(old, 0))
+        resp = self.client.get(reverse('expense-changes'), {'since': since})
+        self.assertEqual(resp.status_code, status.HTTP_410_GONE)
+
+    def test_naive_watermark_is_invalid(self):
+        naive = datetime(2024, 1, 1)
+        since = sync.encode_watermark(sync.Position(naive, 0), sync.Position(naive, 0))
+        resp = self.client.get(reverse('expense-changes'), {'since': since})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_deletion_leaves_no_tombstones(self):
+        self.expenses[0].delete()
+        self.assertEqual(ExpenseTombstone.objects.filter(user=self.user).count(), 1)
+        self.user.delete()
+        self.assertFalse(ExpenseTombstone.objects.exists())
+
+    def test_user_deletion_query_count(self):
+        Expense.objects.bulk_create(
+            Expense(user=self.user, amount='1.00', category='Food', date=date(2024, 1, 1))
+            for _ in range(50)
+        )
+        user_id = self.user.pk
+        with mock.patch('expenses.signals.bump_data_version') as bump:
+            with CaptureQueriesContext(connection) as queries:
+                self.user.delete()
+        bump.assert_called_once_with(user_id)
+        # Independent of the number of expenses deleted.
+        self.assertLess(len(queries), 30)
+        self.assertFalse(ExpenseRollup.objects.exists())
+
+    def test_prune_command(self):
+        kept = self.expenses[1].id
+        self.expenses[0].delete()
+        ExpenseTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=400))
+        self.expenses[1].delete()
+        call_command('prune_expense_tombstones', stdout=io.StringIO())
+        self.assertEqual(list(ExpenseTombstone.objects.values_list('expense_id', flat=True)), [kept])
+
+    def test_sync_reads_are_index_range_scans(self):
+        since = self._sync()['since']
+        queries = query_plans.capture_expense_queries(lambda: self._sync(since))
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(query_plans.plan_problems(queries[0]), [])
+
+
+class AdminAnalyticsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email='ops@example.com', name='Ops', password='securepass123', role='Admin')
+        self.alice = User.objects.create_user(email='alice@example.com', name='Alice', password='securepass123')
+        self.bob = User.objects.create_user(email='bob@example.com', name='Bob', password='securepass123')
+        for user, amount, category, day in [
+            (self.alice, '10.00', 'GROCERIES', date(2024, 1, 5)),
+            (self.alice, '20.00', 'GROCERIES', date(2024, 1, 20)),
+            (self.bob, '5.00', 'GROCERIES', date(2024, 1, 9)),
+            (self.bob, '50.00', 'UTILITIES', date(2024, 2, 1)),
+        ]:
+            Expense.objects.create(user=user, amount=amount, category=category, date=day)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _get(self, name, **params):
+        resp = self.client.get(reverse(f"admin-analytics-{name.replace('_', '-')}"), params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        return resp.data
+
+    def test_requires_admin(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        resp = client.get(reverse('admin-analytics-spending'))
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_serves_the_last_refresh(self):
+        stale = self._get('spending')
+        self.assertIsNone(stale['refreshed_at'])
+
+        call_command('refresh_expense_analytics', stdout=io.StringIO())
+        data = self._get('spending')
+        self.assertIsNotNone(data['refreshed_at'])
+        self.assertEqual(
+            [(row['month'], row['category'], row['total'], row['expense_count'], row['active_users'])
+             for row in data['results']],
+            [(date(2024, 1, 1), 'GROCERIES', Decimal('35.00'), 3, 2),
+             (date(2024, 2, 1), 'UTILITIES', Decimal('50.00'), 1, 1)],
+        )
+
+        Expense.objects.filter(user=self.bob, category='UTILITIES').delete()
+        self.assertEqual(len(self._get('spending')['results']), 2)
+        analytics.refresh()
+        self.assertEqual(len(self._get('spending')['results']), 1)
+
+    def test_active_users_and_top_spenders(self):
+        analytics.refresh()
+        self.assertEqual(
+            [(row['month'], row['active_users']) for row in self._get('active_users')['results']],
+            [(date(2024, 1, 1), 2), (date(2024, 2, 1), 1)],
+        )
+        top = self._get('top_spenders')['results']
+        self.assertEqual([(row['user__email'], row['total']) for row in top],
+                         [('bob@example.com', Decimal('55.00')), ('alice@example.com', Decimal('30.00'))])
+        january = self._get('top_spenders', start='2024-01', end='2024-01', limit=1)['results']
+        self.assertEqual([row['user__email'] for row in january], ['alice@example.com'])
+
+    def test_invalid_range(self):
+        resp = self.client.get(reverse('admin-analytics-spending'), {'start': '2024-03', 'end': '2024-01'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.get(reverse('admin-analytics-spending'), {'start': '2024-13'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_never_reads_the_expense_table(self):
+        table = Expense._meta.db_table
+        with CaptureQueriesContext(connection) as ctx:
+            analytics.refresh()
+            for name in ('spending', 'active_users', 'top_spenders'):
+                self._get(name)
+        self.assertFalse([
+            q['sql'] for q in ctx.captured_queries
+            if re.search(rf'\b{table}\b', q['sql'])
+        ])
+
+
+class BudgetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='budget@example.com', name='Budget', password='securepass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+        self.budget = Budget.objects.create(user=self.user, category='GROCERIES', limit='100.00')
+
+    def _expense(self, amount, category='GROCERIES', **fields):
+        data = {'amount': amount, 'category': category, 'date': self.today.isoformat(), **fields}
+        resp = self.client.post(reverse('expense-list'), data, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        return resp.data
+
+    def test_write_reports_status_and_crossing(self):
+        [state] = self._expense('60.00')['budgets']
+        self.assertEqual(
+            (state['limit'], state['spent'], state['remaining']), ('100.00', '60.00', '40.00')
+        )
+        self.assertFalse(state['exceeded'])
+        self.assertEqual(state['month'], f'{self.today:%Y-%m}')
+
+        [state] = self._expense('50.00')['budgets']
+        self.assertTrue(state['exceeded'])
+        self.assertTrue(state['crossed'])
+        [state] = self._expense('1.00')['budgets']
+        self.assertTrue(state['exceeded'])
+        self.assertFalse(state['crossed'])
+
+        self.assertEqual(self._expense('5.00', category='UTILITIES')['budgets'], [])
+
+    def test_update_and_delete_correct_the_running_total(self):
+        expense = self._expense('80.00')
+        url = reverse('expense-detail', args=[expense['id']])
+        resp = self.client.patch(url, {'amount': '120.00'}, format='json')
+        [state] = resp.data['budgets']
+        self.assertEqual((state['spent'], state['remaining']), ('120.00', '-20.00'))
+        self.assertTrue(state['crossed'])
+
+        resp = self.client.patch(url, {'category': 'utilities'}, format='json')
+        [state] = resp.data['budgets']
+        self.assertEqual((state['category'], state['spent']), ('GROCERIES', '0.00'))
+
+        self.client.patch(url, {'category': 'GROCERIES'}, format='json')
+        self.client.delete(url)
+        resp = self.client.get(reverse('budget-list'))
+        self.assertEqual(resp.json()[0]['spent'], '0.00')
+
+    def test_list_reads_only_rollups(self):
+        Budget.objects.create(user=self.user, category='UTILITIES', limit='50.00')
+        self._expense('30.00')
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('budget-list'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertFalse([q['sql'] for q in ctx.captured_queries
+                          if re.search(rf'\b{Expense._meta.db_table}\b', q['sql'])])
+        self.assertEqual(
+            [(row['category'], row['limit'], row['spent'], row['exceeded']) for row in resp.json()],
+            [('GROCERIES', '100.00', '30.00', False), ('UTILITIES', '50.00', '0.00', False)],
+        )
+
+        last_month = rollups.month_start(self.today) - timedelta(days=1)
+        resp = self.client.get(reverse('budget-list'), {'month': f'{last_month:%Y-%m}'})
+        self.assertEqual((resp.data[0]['spent'], resp.data[0]['remaining']), ('0.00', '100.00'))
+        resp = self.client.get(reverse('budget-list'), {'month': 'soon'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_budget_crud(self):
+        resp = self.client.post(reverse('budget-list'), {'category': 'entertainment', 'limit': '25.00'})
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        self.assertEqual(resp.data['category'], 'ENTERTAINMENT')
+        self.assertEqual(resp.json()['remaining'], '25.00')
+
+        resp = self.client.post(reverse('budget-list'), {'category': 'GROCERIES', 'limit': '10.00'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.post(reverse('budget-list'), {'category': 'TRAVEL', 'limit': '10.00'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        other = User.objects.create_user(email='other@example.com', name='Other', password='securepass123')
+        foreign = Budget.objects.create(user=other, category='GROCERIES', limit='5.00')
+        resp = self.client.get(reverse('budget-detail', args=[foreign.pk]))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RecurringExpenseTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='rent@example.com', name='Rent', password='securepass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _schedule(self, start, frequency='MONTHLY', **fields):
+        fields.setdefault('amount', '1000.00')
+        fields.setdefault('category', 'UTILITIES')
+        return RecurringExpense.objects.create(
+            user=self.user, frequency=frequency, start_date=start, next_run=start, **fields
+        )
+
+    def _materialize(self, until, **options):
+        out = io.StringIO()
+        call_command('materialize_recurring', date=until, stdout=out, **options)
+        return out.getvalue()
+
+    def test_occurrences_keep_their_anchor(self):
+        monthly = self._schedule(date(2024, 1, 31))
+        self.assertEqual(
+            [recurring.occurrence(monthly, n) for n in range(4)],
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)],
+        )
+        fortnightly = self._schedule(date(2024, 1, 1), 'WEEKLY', interval=2)
+        self.assertEqual(recurring.occurrence(fortnightly, 3), date(2024, 2, 12))
+        leap = self._schedule(date(2024, 2, 29), 'YEARLY')
+        self.assertEqual(recurring.occurrence(leap, 1), date(2025, 2, 28))
+        self.assertEqual(recurring.first_on_or_after(monthly, date(2024, 3, 1)), date(2024, 3, 31))
+
+    def test_materializes_due_occurrences_once(self):
+        rent = self._schedule(date(2024, 1, 31), description='Rent')
+        gym = self._schedule(date(2024, 2, 10), 'WEEKLY', amount='20.00', category='ENTERTAINMENT',
+                             end_date=date(2024, 2, 24))
+        self.assertIn('Materialized 6 expenses from 2 schedules', self._materialize(date(2024, 3, 31)))
+
+        self.assertEqual(
+            list(rent.occurrences.order_by('date').values_list('date', flat=True)),
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)],
+        )
+        self.assertEqual(gym.occurrences.count(), 3)
+        rent.refresh_from_db()
+        gym.refresh_from_db()
+        self.assertEqual(rent.next_run, date(2024, 4, 30))
+        self.assertIsNone(gym.next_run)
+        self.assertEqual(
+            ExpenseRollup.objects.get(user=self.user, month=date(2024, 2, 1), category='ENTERTAINMENT').total,
+            Decimal('60.00'),
+        )
+
+        self.assertIn('Materialized 0 expenses from 0 schedules', self._materialize(date(2024, 3, 31)))
+        # A schedule rewound by hand skips the occurrences it already has.
+        RecurringExpense.objects.filter(pk=rent.pk).update(next_run=rent.start_date)
+        self.assertIn('Materialized 0 expenses from 1 schedules', self._materialize(date(2024, 3, 31)))
+        self.assertEqual(rent.occurrences.count(), 3)
+        with self.assertRaises(IntegrityError):
+            Expense.objects.create(user=self.user, amount='1.00', category='UTILITIES',
+                                   date=date(2024, 1, 31), recurring=rent)
+
+    def test_chunks_and_due_index(self):
+        for day in range(1, 6):
+            self._schedule(date(2024, 1, day))
+        with CaptureQueriesContext(connection) as ctx:
+            processed, created = recurring.materialize(date(2024, 1, 31), chunk_size=2)
+        self.assertEqual((processed, created), (5, 5))
+        table = RecurringExpense._meta.db_table
+        [due, *_] = [q['sql'] for q in ctx.captured_queries
+                     if q['sql'].startswith('SELECT') and f'FROM "{table}"' in q['sql']]
+        if connection.vendor == 'sqlite':
+            self.assertIn('recurring_next_run_idx', ' '.join(query_plans.explain(due)))
+
+    def test_command_rejects_future_dates(self):
+        with self.assertRaises(CommandError):
+            self._materialize(timezone.now().date() + timedelta(days=1))
+
+    def test_api(self):
+        url = reverse('recurring-expense-list')
+        start = timezone.now().date()
+        resp = self.client.post(url, {'amount': '15.99', 'category': 'entertainment',
+                                      'frequency': 'MONTHLY', 'start_date': start.isoformat()})
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        self.assertEqual(resp.data['next_run'], start.isoformat())
+        detail = reverse('recurring-expense-detail', args=[resp.data['id']])
+
+        resp = self.client.patch(detail, {'frequency': 'WEEKLY'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.patch(detail, {'end_date': (start - timedelta(days=1)).isoformat()})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self._materialize(start)
+        resp = self.client.patch(detail, {'end_date': start.isoformat()})
+        self.assertIsNone(resp.data['next_run'])
+        resp = self.client.patch(detail, {'end_date': None}, format='json')
+        self.assertEqual(resp.data['next_run'],
+                         recurring.occurrence(RecurringExpense.objects.get(), 1).isoformat())
+
+        self.client.delete(detail)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 1)
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from .models import Expense
+from .rollups import rollups_for
+from .serializers import format_amount, format_date
+
+TRUNCATE = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+MAX_BUCKETS = 2000
+
+
+class TooManyBuckets(Exception):
+    pass
+
+
+def bucket_start(value, interval):
+    if interval == 'week':
+        return value - timedelta(days=value.weekday())
+    if interval == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def next_bucket(value, interval):
+    if interval == 'month':
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=7 if interval == 'week' else 1)
+
+
+def _grouped_rows(user, queryset, params, interval, by_category):
+    """
+    Yields (period, category or None, total, count) from one GROUP BY.
+
+    Whole-month filters on monthly buckets are read from the rollups.
+    """
+    group = ['period', 'category'] if by_category else ['period']
+    rollups = rollups_for(user, params) if interval == 'month' else None
+    if rollups is not None:
+        rows = (
+            rollups.filter(count__gt=0)
+            .order_by()
+            .annotate(period=F('month'))
+            .values(*group)
+            .annotate(total=Sum('total'), count=Sum('count'))
+        )
+    else:
+        rows = (
+            queryset.order_by()
+            .annotate(period=TRUNCATE[interval]('date'))
+            .values(*group)
+            .annotate(total=Sum('amount'), count=Count('id'))
+        )
+    for row in rows:
+        yield row['period'], row.get('category'), row['total'], row['count']
+
+
+def spending_timeseries(user, queryset, params, interval='month', by_category=False):
+    """
+    Spending totals per day/week/month bucket for the filtered expenses.
+
+    Buckets between the first and last (or the filter's start/end date)
+    are filled with zeros; with ``by_category`` every bucket carries a row
+    per category.
+    """
+    found = {}
+    for period, category, total, count in _grouped_rows(
+        user, queryset, params, interval, by_category
+    ):
+        found[(period, category)] = (total or Decimal('0'), count or 0)
+
+    periods = [period for period, _ in found]
+    first = params.get('start_date') or (min(periods) if periods else None)
+    last = params.get('end_date') or (max(periods) if periods else None)
+    if first is None or last is None or first > last:
+        return []
+
+    if params.get('category'):
+        categories = [params['category']]
+    elif by_category:
+        categories = [code for code, _ in Expense.CATEGORIES]
+    else:
+        categories = [None]
+
+    results = []
+    period, last = bucket_start(first, interval), bucket_start(last, interval)
+    while period <= last:
+        if len(results) >= MAX_BUCKETS * len(categories):
+            raise TooManyBuckets(
+                f'More than {MAX_BUCKETS} {interval} buckets; narrow the date range.'
+            )
+        for category in categories:
+            key = (period, category if by_category else None)
+            total, count = found.get(key, (Decimal('0'), 0))
+            row = {'period': format_date(period)}
+            if by_category:
+                row['category'] = category
+            row['total'] = format_amount(total)
+            row['count'] = count
+            results.append(row)
+        period = next_bucket(period, interval)
+    return results
@@ -1,8 +1,24 @@
 from django.urls import path
-from .views import ExpenseViewSet, ExpenseReportView
+from rest_framework.routers import DefaultRouter
 
+from . import async_views
+from .views import (
+    AdminAnalyticsView, BudgetViewSet, ExpenseCacheMetricsView, ExpenseViewSet, ExpenseReportView,
+    RecurringExpenseViewSet,
+)
+
+
+router = DefaultRouter()
+router.register('admin/analytics', AdminAnalyticsView, basename='admin-analytics')
+router.register('budgets', BudgetViewSet, basename='budget')
+router.register('expenses/recurring', RecurringExpenseViewSet, basename='recurring-expense')
+router.register('expenses/reports', ExpenseReportView, basename='expense-reports')
+router.register('expenses', ExpenseViewSet, basename='expense')
 
 urlpatterns = [
-    path('expenses/reports/', ExpenseReportView.as_view(), name='expense-reports'),
-    path('expenses/', ExpenseViewSet.as_view(), name='expense'),
-]
\ No newline at end of file
+    path('expenses/cache-metrics/', ExpenseCacheMetricsView.as_view(), name='expense-cache-metrics'),
+    path('async/expenses/', async_views.expense_list, name='async-expense-list'),
+    path('async/expenses/summary/', async_views.expense_summary, name='async-expense-summary'),
+    path('async/expenses/reports/spending_chart/', async_views.spending_chart,
+         name='async-expense-reports-spending-chart'),
+] + router.urls
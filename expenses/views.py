@@ -1,14 +1,40 @@
+import io
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
 from django.db.models import Avg, Count, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django_filters import utils
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets
+from rest_framework import serializers, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from . import analytics, budgets, exports, rollups, search, sync
+from .caching import cache_metrics, cached_response, record_cache_result
 from .filters import ExpenseFilter
-from .models import Expense
-from .reports import generate_spending_chart
-from .serializers import ExpenseSerializer
-from users.permissions import IsUser
+from .importers import ImportFormatError, import_expenses
+from .models import Budget, Expense, RecurringExpense
+from .pagination import ExpenseCursorPagination
+from .renderers import (
+    ChartDataRenderer, CSVRenderer, NDJSONRenderer, PNGRenderer, SVGRenderer,
+)
+from .reports import chart_options, encode_chart, request_spending_chart, spending_series
+from .rollups import ExpenseRow, expense_row
+from .serializers import (
+    AnalyticsRangeSerializer, BudgetSerializer, ExpenseFastSerializer,
+    ExpenseSerializer, RecurringExpenseSerializer, format_budget_status,
+)
+from .signals import expenses_deleted, suspended
+from .timeseries import TRUNCATE, TooManyBuckets, spending_timeseries
+from users.permissions import IsAdmin, IsUser
+
+CACHED_READS = ('list', 'summary', 'timeseries', 'search', 'spending_chart', 'spending_chart_data')
 
 
 class ExpenseViewSet(viewsets.ModelViewSet):
@@ -19,35 +45,472 @@ class ExpenseViewSet(viewsets.ModelViewSet):
     permission_classes = [IsUser]
     filter_backends = [DjangoFilterBackend]
     filterset_class = ExpenseFilter
+    pagination_class = ExpenseCursorPagination
     ordering_fields = ['date', 'amount']
     ordering = ['-date']
 
+    IMPORT_REJECTS_REPORTED = 100
+    SEARCH_LIMIT = 50
+    MAX_SEARCH_LIMIT = 200
+    SYNC_LIMIT = 500
+    MAX_SYNC_LIMIT = 2000
+
+    # Actions that only ever read the columns ExpenseSerializer emits.
+    LEAN_ACTIONS = {'list', 'retrieve', 'summary', 'timeseries', 'search', 'export'}
+
     def get_queryset(self):
-        return (
-            Expense.objects.filter(user=self.request.user)
-            .select_related('user')
+        # The user row is never needed: ownership is the filter and
+        # ExpenseSerializer hides the field.
+        qs = Expense.objects.filter(user=self.request.user)
+        if self.action in self.LEAN_ACTIONS:
+            qs = qs.only(*ExpenseFastSerializer.fields)
+        return qs
+
+    def cached(self, name, params, compute):
+        """
+        Response for a per-user read through the versioned response cache.
+        """
+        data, hit = cached_response(self.request.user.pk, name, params, compute)
+        return Response(data, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+
+    # Single writes run in one transaction with the rollup increments their
+    # signals apply, and answer with the status of the budgets they touched.
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+            self.budget_statuses = budgets.write_statuses(
+                self.request.user, added=[expense_row(serializer.instance)]
+            )
+
+    def perform_update(self, serializer):
+        previous = expense_row(serializer.instance)
+        with transaction.atomic():
+            serializer.save()
+            self.budget_statuses = budgets.write_statuses(
+                self.request.user, added=[expense_row(serializer.instance)], removed=[previous]
+            )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data['budgets'] = [format_budget_status(s) for s in self.budget_statuses]
+        return response
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        response.data['budgets'] = [format_budget_status(s) for s in self.budget_statuses]
+        return response
+
+    def list(self, request, *args, **kwargs):
+        params = dict(self.get_filter_params())
+        params.update(
+            (key, request.query_params.get(key))
+            for key in (self.paginator.cursor_query_param,
+                        self.paginator.page_size_query_param)
         )
+        # Page links are absolute, so the host and path are part of the key.
+        params['host'] = request.get_host()
+        params['path'] = request.path
+        return self.cached('list', params, self._list_data)
+
+    def _list_data(self):
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *ExpenseFastSerializer.fields
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(ExpenseFastSerializer(page).data).data
+        return ExpenseFastSerializer(queryset).data
+
+    def get_filter_params(self):
+        """
+        Validated ExpenseFilter values for the current request.
+        """
+        filterset = self.filterset_class(
+            self.request.query_params,
+            queryset=self.get_queryset(),
+            request=self.request,
+        )
+        if not filterset.is_valid():
+            raise utils.translate_validation(filterset.errors)
+        return filterset.form.cleaned_data
 
     @action(detail=False, methods=['get'])
     def summary(self, request):
-        qs = self.filter_queryset(self.get_queryset())
-        stats = qs.aggregate(
-            total=Sum('amount'),
-            average=Avg('amount'),
-            count=Count('id')
-        )
-        return Response({
+        params = self.get_filter_params()
+        return self.cached('summary', params, lambda: self._summary_data(params))
+
+    def _summary_data(self, params):
+        stats = rollups.summarize(self.request.user, params)
+        if stats is None:
+            qs = self.filter_queryset(self.get_queryset())
+            stats = qs.aggregate(
+                total=Sum('amount'),
+                average=Avg('amount'),
+                count=Count('id')
+            )
+        return {
             'total_expenses': stats['total'] or 0,
             'average_expense': stats['average'] or 0,
             'transaction_count': stats['count'] or 0,
+        }
+
+    @action(detail=False, methods=['get'])
+    def timeseries(self, request):
+        """
+        Spending per ``interval`` (day, week or month; default month).
+
+        ``group_by=category`` splits each bucket by category. Empty buckets
+        are filled with zeros.
+        """
+        interval = request.query_params.get('interval', 'month')
+        if interval not in TRUNCATE:
+            raise serializers.ValidationError(
+                {'interval': [f'Choose from: {", ".join(TRUNCATE)}.']}
+            )
+        group_by = request.query_params.get('group_by')
+        if group_by not in (None, '', 'category'):
+            raise serializers.ValidationError({'group_by': ['Only "category" is supported.']})
+
+        params = self.get_filter_params()
+
+        def compute():
+            try:
+                results = spending_timeseries(
+                    request.user,
+                    self.filter_queryset(self.get_queryset()),
+                    params,
+                    interval=interval,
+                    by_category=group_by == 'category',
+                )
+            except TooManyBuckets as exc:
+                raise serializers.ValidationError(str(exc))
+            return {'interval': interval, 'results': results}
+
+        return self.cached(
+            'timeseries', {**params, 'interval': interval, 'group_by': group_by}, compute
+        )
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Expenses whose description matches ``q``, best match first.
+
+        The other filters apply as on the list; ``limit`` caps the results
+        (default SEARCH_LIMIT, at most MAX_SEARCH_LIMIT).
+        """
+        params = self.get_filter_params()
+        if not params.get('q'):
+            raise serializers.ValidationError({'q': ['This parameter is required.']})
+        limit = self.get_limit(self.SEARCH_LIMIT, self.MAX_SEARCH_LIMIT)
+
+        def compute():
+            rows = list(
+                search.rank_results(self.filter_queryset(self.get_queryset()), params['q'])
+                .values(*ExpenseFastSerializer.fields, 'rank')[:limit]
+            )
+            results = ExpenseFastSerializer(rows).data
+            for item, row in zip(results, rows):
+                item['rank'] = round(row['rank'], 6)
+            return {'results': results}
+
+        return self.cached('search', {**params, 'limit': limit}, compute)
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Expenses written and deleted since the ``since`` watermark.
+
+        Returns changed expenses, the ids of deleted ones and the watermark
+        to send next time. Without ``since`` every expense is sent. While
+        ``has_more`` is true, call again straight away with the new
+        watermark. 410 means the watermark is older than the tombstone
+        retention and the client must sync from scratch.
+        """
+        limit = self.get_limit(self.SYNC_LIMIT, self.MAX_SYNC_LIMIT)
+        try:
+            result = sync.changes_since(
+                request.user, request.query_params.get('since'), limit
+            )
+        except sync.InvalidWatermark as exc:
+            raise serializers.ValidationError({'since': [str(exc)]})
+        except sync.ExpiredWatermark as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_410_GONE)
+
+        changed = ExpenseFastSerializer(result.changed).data
+        for item, row in zip(changed, result.changed):
+            item['updated_at'] = row['updated_at']
+        return Response({
+            'changed': changed,
+            'deleted': result.deleted,
+            'since': result.watermark,
+            'has_more': result.has_more,
         })
 
+    def get_limit(self, default, maximum):
+        try:
+            return serializers.IntegerField(min_value=1, max_value=maximum).run_validation(
+                self.request.query_params.get('limit', default)
+            )
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({'limit': exc.detail})
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        """
+        Batch create (POST), partial update (PATCH) or delete (DELETE).
+
+        Creates and updates take a list of expenses and fail as a whole with
+        one error entry per item. Deletes take ``{"ids": [...]}`` and report
+        the ids that did not match.
+        """
+        if request.method == 'DELETE':
+            return self._bulk_delete(request)
+
+        max_items = settings.EXPENSE_BULK_MAX_ITEMS
+        if request.method == 'POST':
+            serializer = self.get_serializer(
+                data=request.data, many=True, max_length=max_items
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        if not isinstance(request.data, list):
+            raise serializers.ValidationError('Expected a list of expenses.')
+        ids = [item.get('id') for item in request.data if isinstance(item, dict)]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError('Each expense may appear only once.')
+
+        with transaction.atomic():
+            instances = self.get_queryset().select_for_update().in_bulk(
+                [pk for pk in ids if isinstance(pk, int)]
+            )
+            serializer = self.get_serializer(
+                instances, data=request.data, many=True, partial=True,
+                max_length=max_items,
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(serializer.data)
+
+    def _bulk_delete(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if (
+            not isinstance(ids, list)
+            or not all(isinstance(pk, int) for pk in ids)
+            or len(ids) > settings.EXPENSE_BULK_MAX_ITEMS
+        ):
+            raise serializers.ValidationError(
+                {'ids': ['Expected a list of at most '
+                         f'{settings.EXPENSE_BULK_MAX_ITEMS} expense ids.']}
+            )
+
+        with transaction.atomic(), suspended():
+            qs = self.get_queryset().filter(id__in=ids)
+            rows = [
+                ExpenseRow(*values) for values in
+                qs.select_for_update().values_list(*ExpenseRow._fields)
+            ]
+            qs.delete()
+            expenses_deleted(rows)
+
+        deleted = {row.id for row in rows}
+        return Response({
+            'deleted': len(deleted),
+            'not_found': [pk for pk in ids if pk not in deleted],
+        })
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """
+        Streams the filtered expenses as CSV (default) or NDJSON.
+
+        Pick the format with ``?format=csv|ndjson`` or the Accept header.
+        Under ASGI the body is an async iterator, which Django streams
+        instead of buffering.
+        """
+        qs = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+        is_async = isinstance(request._request, ASGIRequest)
+        if renderer.format == 'ndjson':
+            body = (exports.astream_ndjson if is_async else exports.stream_ndjson)(qs)
+        else:
+            body = (exports.astream_csv if is_async else exports.stream_csv)(qs)
+        response = StreamingHttpResponse(
+            body, content_type=f'{renderer.media_type}; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="expenses.{renderer.format}"'
+        )
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import',
+            parser_classes=[MultiPartParser])
+    def import_csv(self, request):
+        """
+        Imports a CSV upload (``file``) in batches.
+
+        Valid rows are kept even when others are rejected; the response
+        lists up to IMPORT_REJECTS_REPORTED rejects with their line numbers.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise serializers.ValidationError({'file': ['A CSV file is required.']})
+
+        rejects = []
+
+        def collect(line, errors):
+            if len(rejects) < self.IMPORT_REJECTS_REPORTED:
+                rejects.append({'line': line, 'errors': errors})
+
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            result = import_expenses(request.user, stream, on_reject=collect)
+        except (ImportFormatError, UnicodeDecodeError) as exc:
+            raise serializers.ValidationError({'file': [str(exc)]})
+
+        return Response({
+            'imported': result.imported,
+            'rejected': result.rejected,
+            'rejects': rejects,
+        }, status=status.HTTP_201_CREATED if result.imported else status.HTTP_200_OK)
+
+
+class BudgetViewSet(viewsets.ModelViewSet):
+    """
+    A user's monthly category budgets, each with its status for ``?month=``
+    (``YYYY-MM``, default the current month).
+
+    Status comes from the running rollup totals; listing costs one query
+    for the budgets and one for the month's rollups.
+    """
+    serializer_class = BudgetSerializer
+    permission_classes = [IsUser]
+    filter_backends = []
+
+    def get_queryset(self):
+        return Budget.objects.filter(user=self.request.user)
+
+    def get_month(self):
+        month = self.request.query_params.get('month')
+        if month is None:
+            return rollups.month_start(timezone.now().date())
+        try:
+            return serializers.DateField(input_formats=['%Y-%m']).run_validation(month)
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({'month': exc.detail})
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['month'] = self.get_month()
+        if self.action == 'list':
+            context['spending'] = budgets.spending(self.request.user, context['month'])
+        return context
+
+
+class RecurringExpenseViewSet(viewsets.ModelViewSet):
+    """
+    A user's recurring expense schedules.
+
+    Expenses appear when the materialize_recurring command next runs;
+    deleting a schedule keeps the expenses it already created.
+    """
+    serializer_class = RecurringExpenseSerializer
+    permission_classes = [IsUser]
+    filter_backends = []
+
+    def get_queryset(self):
+        return RecurringExpense.objects.filter(user=self.request.user)
+
 
 class ExpenseReportView(viewsets.GenericViewSet):
     """Provides report endpoints for expenses."""
     permission_classes = [IsUser]
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], renderer_classes=[
+        JSONRenderer, BrowsableAPIRenderer, PNGRenderer, SVGRenderer, ChartDataRenderer,
+    ])
     def spending_chart(self, request):
-        chart = generate_spending_chart(request.user)
-        return Response({'chart': chart})
\ No newline at end of file
+        """
+        Spending per category, in the representation picked by ``?format=``.
+
+        json (default) wraps a base64 PNG; png and svg send the raw image
+        (204 when there is nothing to plot); data sends the series for
+        client-side rendering. Images take ``width``/``height`` in inches,
+        PNGs also ``dpi``.
+        """
+        fmt = request.accepted_renderer.format
+        if fmt == 'data':
+            data, hit = cached_response(
+                request.user.pk, 'spending_chart_data', {},
+                lambda: {'results': spending_series(request.user)},
+            )
+            return Response(data, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+
+        fmt, options = chart_options(fmt, request.query_params)
+        ready, chart = request_spending_chart(request.user, fmt=fmt, **options)
+        record_cache_result('spending_chart', ready)
+        if not ready:
+            return Response(
+                {'status': 'pending', 'poll_url': request.build_absolute_uri()},
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Retry-After': '1', 'X-Cache': 'MISS'},
+            )
+        if request.accepted_renderer.format in ('png', 'svg'):
+            if chart is None:
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            return Response(chart, headers={'X-Cache': 'HIT'})
+        return Response({'chart': encode_chart(chart)}, headers={'X-Cache': 'HIT'})
+
+
+class AdminAnalyticsView(viewsets.ViewSet):
+    """
+    Spending across all users, for admins.
+
+    Reads only the summaries in expenses.analytics, never the expense
+    table; ``refreshed_at`` tells how current they are.
+    """
+    permission_classes = [IsAdmin]
+
+    def _respond(self, results):
+        return Response({'refreshed_at': analytics.refreshed_at(), 'results': results})
+
+    def _params(self):
+        params = AnalyticsRangeSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.validated_data
+
+    @action(detail=False, methods=['get'])
+    def spending(self, request):
+        """Total, count and active users per month and category."""
+        params = self._params()
+        return self._respond(analytics.spending(
+            params.get('start'), params.get('end'), params.get('category')
+        ))
+
+    @action(detail=False, methods=['get'])
+    def active_users(self, request):
+        """Users with at least one expense, per month."""
+        params = self._params()
+        return self._respond(analytics.active_users(params.get('start'), params.get('end')))
+
+    @action(detail=False, methods=['get'])
+    def top_spenders(self, request):
+        """The ``limit`` (default 10) biggest spenders over the range."""
+        params = self._params()
+        return self._respond(analytics.top_spenders(
+            params.get('start'), params.get('end'), params['limit']
+        ))
+
+
+class ExpenseCacheMetricsView(APIView):
+    """Hit/miss counters of the expense read caches, for admins."""
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(cache_metrics(CACHED_READS))
\ No newline at end of file
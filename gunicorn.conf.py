@@ -0,0 +1,19 @@
+"""
+Gunicorn settings: gunicorn -c gunicorn.conf.py expense_tracker.asgi:application
+
+Workers are uvicorn (ASGI) workers by default; set
+GUNICORN_WORKER_CLASS=sync and serve expense_tracker.wsgi:application
+for plain WSGI.
+"""
+from decouple import config
+
+bind = config('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = config('GUNICORN_WORKERS', default=3, cast=int)
+worker_class = config('GUNICORN_WORKER_CLASS', default='uvicorn_worker.UvicornWorker')
+
+# Import the application once in the master so workers fork with Django,
+# DRF and the project modules already loaded and share those pages
+# copy-on-write. Nothing opens database or cache connections at import
+# time, so no sockets are inherited. Code reloads then need a full
+# restart instead of a HUP.
+preload_app = config('GUNICORN_PRELOAD', default=False, cast=bool)
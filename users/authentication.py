@@ -0,0 +1,120 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+ROLE_CLAIM = 'role'
+AUTH_STATE_TIMEOUT = 60
+
+
+def _state_key(user_id):
+    return f'users:auth-state:{user_id}'
+
+
+def get_auth_state(user_id):
+    """
+    Returns ``(is_active, role)`` for a user, or None if they do not exist.
+
+    Cached briefly so revocation (deactivation, role change, deletion)
+    takes effect within AUTH_STATE_TIMEOUT without a query per request.
+    """
+    key = _state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = (
+            User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values_list('is_active', 'role')
+            .first()
+        )
+        state = tuple(row) if row else ()
+        cache.set(key, state, AUTH_STATE_TIMEOUT)
+    return state or None
+
+
+async def aget_auth_state(user_id):
+    """
+    Async get_auth_state(), sharing its cache entries.
+    """
+    key = _state_key(user_id)
+    state = await cache.aget(key)
+    if state is None:
+        row = await (
+            User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values_list('is_active', 'role')
+            .afirst()
+        )
+        state = tuple(row) if row else ()
+        await cache.aset(key, state, AUTH_STATE_TIMEOUT)
+    return state or None
+
+
+def forget_auth_state(user_id):
+    cache.delete(_state_key(user_id))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds request.user from the token's claims.
+
+    Tokens carry the user's role (see CustomTokenObtainPairSerializer), so
+    the user is an unsaved CustomUser holding only its primary key and
+    role, which is all IsUser/IsAdmin and expense ownership need. Tokens
+    issued before the role claim existed fall back to a database lookup.
+    """
+
+    def get_user(self, validated_token):
+        user_id, role = self.get_claims(validated_token)
+        if role is None:
+            return super().get_user(validated_token)
+        return self.claims_user(user_id, role, get_auth_state(user_id))
+
+    async def aauthenticate(self, request):
+        """
+        Async authenticate() for plain Django async views.
+
+        Returns ``(user, token)`` or None without a bearer token. Token
+        checks are CPU-only; the auth state comes from the async cache and
+        ORM.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        user_id, role = self.get_claims(validated_token)
+        if role is None:
+            user = await sync_to_async(super().get_user)(validated_token)
+        else:
+            user = self.claims_user(user_id, role, await aget_auth_state(user_id))
+        return user, validated_token
+
+    def get_claims(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        return user_id, validated_token.get(ROLE_CLAIM)
+
+    def claims_user(self, user_id, role, state):
+        if state is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        is_active, current_role = state
+        if not is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if current_role != role:
+            raise AuthenticationFailed(
+                _('Token role is out of date; log in again.'), code='role_changed'
+            )
+
+        user = User(**{api_settings.USER_ID_FIELD: user_id}, role=role, is_active=True)
+        user._state.adding = False
+        return user
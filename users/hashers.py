@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with its iteration count read from PASSWORD_PBKDF2_ITERATIONS.
+
+    Changing the setting needs no downtime: existing hashes keep verifying
+    and are re-hashed at the new cost on each user's next login.
+    """
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
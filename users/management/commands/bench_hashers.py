@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from expenses.benchmarks import SEED_PASSWORD, percentile
+from users import passwords
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Time hashing and verification for each configured password hasher, '
+        'then fire a login burst at the hash pool and count shed requests.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5)
+        parser.add_argument('--burst', type=int,
+                            help='Concurrent verifications (default: 2x the pool capacity).')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'hasher':<40}{'hash p50':>10}{'verify p50':>12}{'verify p95':>12}")
+        for path in settings.PASSWORD_HASHERS:
+            hasher, name = import_string(path)(), path.rsplit('.', 1)[-1]
+            try:
+                encoded = hasher.encode(SEED_PASSWORD, hasher.salt())
+            except ValueError:
+                self.stdout.write(f'{name:<40}  library not installed')
+                continue
+            hashes = [timed(hasher.encode, SEED_PASSWORD, hasher.salt())
+                      for _ in range(options['iterations'])]
+            verifies = [timed(hasher.verify, SEED_PASSWORD, encoded)
+                        for _ in range(options['iterations'])]
+            self.stdout.write(
+                f'{name:<40}{percentile(hashes, 50):>8.1f}ms'
+                f'{percentile(verifies, 50):>10.1f}ms{percentile(verifies, 95):>10.1f}ms'
+            )
+
+        workers, queue = settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE
+        burst = options['burst'] or 2 * (workers + queue)
+        served, shed, elapsed, timings = asyncio.run(self.burst(burst))
+        self.stdout.write(
+            f'Pool ({workers} workers, queue {queue}): burst of {burst}, served {served}, '
+            f'shed {shed} with 429, {served / elapsed:.1f} verifications/s'
+            + (f', p95 {percentile(timings, 95):.0f} ms' if timings else '')
+        )
+
+    async def burst(self, size):
+        encoded = await passwords.amake_password(SEED_PASSWORD)
+        timings, shed = [], 0
+
+        async def one():
+            nonlocal shed
+            start = time.perf_counter()
+            try:
+                await passwords.run(passwords.verify, SEED_PASSWORD, encoded)
+            except passwords.HashingOverloaded:
+                shed += 1
+                return
+            timings.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(size)))
+        return len(timings), shed, time.perf_counter() - start, timings
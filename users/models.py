@@ -5,7 +5,11 @@ from django.utils import timezone
 import uuid
 
 class CustomUserManager(BaseUserManager):
-    def create_user(self, email, name, password=None, **extra_fields):
+    def create_user(self, email, name, password=None, password_hash=None, **extra_fields):
+        """
+        ``password_hash`` stores an already hashed password (see
+        users.passwords) instead of hashing ``password`` here.
+        """
         if not email:
             raise ValueError('Users must have an email address')
         user = self.model(
@@ -13,13 +17,17 @@ class CustomUserManager(BaseUserManager):
             name=name,
             **extra_fields
         )
-        user.set_password(password)
+        if password_hash is None:
+            user.set_password(password)
+        else:
+            user.password = password_hash
         user.save(using=self._db)
         return user
 
     def create_superuser(self, email, name, password=None, **extra_fields):
         extra_fields.setdefault('is_staff', True)
         extra_fields.setdefault('is_superuser', True)
+        extra_fields.setdefault('role', 'Admin')
         return self.create_user(email, name, password, **extra_fields)
 
 class CustomUser(AbstractUser):
@@ -0,0 +1,114 @@
+"""
+Password hashing and verification off the request path.
+
+A PBKDF2 hash costs hundreds of milliseconds of CPU. Run inline on the
+ASGI worker's single thread for sync views, a login burst holds up every
+request behind it. Here hashes run in a small per-process thread pool
+(hashlib and the Argon2/bcrypt bindings release the GIL) that the async
+signup and login views await.
+
+The pool's backlog is bounded. While PASSWORD_HASH_WORKERS hashes run and
+PASSWORD_HASH_QUEUE more wait, new ones raise HashingOverloaded, which
+the views answer with 429 instead of queueing without limit.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+
+User = get_user_model()
+
+_lock = threading.Lock()
+_pool = None
+
+
+class HashingOverloaded(Exception):
+    pass
+
+
+class HashPool:
+    def __init__(self, workers, queue):
+        self.size = (workers, queue)
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='password-hash')
+        self.slots = threading.BoundedSemaphore(workers + queue)
+
+    def submit(self, func, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HashingOverloaded('Too many password checks in progress.')
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+
+def get_pool():
+    """
+    The process's hash pool, rebuilt if its size settings changed.
+    """
+    global _pool
+    size = (settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE)
+    with _lock:
+        if _pool is None or _pool.size != size:
+            if _pool is not None:
+                _pool.executor.shutdown(wait=False)
+            _pool = HashPool(*size)
+        return _pool
+
+
+def submit(func, *args):
+    """
+    Run ``func(*args)`` in the hash pool; raises HashingOverloaded when full.
+    """
+    return get_pool().submit(func, *args)
+
+
+async def run(func, *args):
+    return await asyncio.wrap_future(submit(func, *args))
+
+
+def verify(password, encoded):
+    """
+    ``(is_correct, new_encoded)``; ``new_encoded`` is set when the stored
+    hash uses an outdated hasher or cost and should be replaced.
+    """
+    upgraded = []
+    is_correct = check_password(
+        password, encoded, setter=lambda raw: upgraded.append(make_password(raw))
+    )
+    return is_correct, upgraded[0] if upgraded else None
+
+
+async def amake_password(password):
+    return await run(make_password, password)
+
+
+async def aauthenticate(email, password):
+    """
+    The active user with these credentials, or None.
+
+    Mirrors ModelBackend: an unknown email still pays for one hash, so
+    response times do not reveal which accounts exist. A correct password
+    stored under an outdated hasher or cost is re-hashed in the pool and
+    saved, so cost changes roll out as users log in.
+    """
+    user = await User._default_manager.filter(**{User.USERNAME_FIELD: email}).afirst()
+    if user is None:
+        await amake_password(password)
+        return None
+
+    is_correct, upgraded = await run(verify, password, user.password)
+    if not is_correct or not user.is_active:
+        return None
+    if upgraded:
+        # Conditional, so a concurrent password change is never overwritten.
+        await User._default_manager.filter(pk=user.pk, password=user.password).aupdate(
+            password=upgraded
+        )
+        user.password = upgraded
+    return user
@@ -1,5 +1,13 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    PasswordField, TokenBlacklistSerializer, TokenObtainPairSerializer, TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from django.contrib.auth.models import update_last_login
+from .authentication import ROLE_CLAIM, get_auth_state
 from .models import CustomUser
+from .tokens import BlacklistRefreshToken
 from django.contrib.auth.password_validation import validate_password
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -10,9 +18,69 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ('email', 'name', 'password')
 
     def create(self, validated_data):
+        # The signup view hashes in the password pool and passes
+        # ``password_hash`` to save().
         return CustomUser.objects.create_user(
             email=validated_data['email'],
             name=validated_data['name'],
             password=validated_data['password'],
+            password_hash=validated_data.get('password_hash'),
             role='User'
-        )
\ No newline at end of file
+        )
+
+class LoginSerializer(serializers.Serializer):
+    email = serializers.CharField(write_only=True)
+    password = PasswordField()
+
+
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Adds the user's role to issued tokens for claims-based auth."""
+    token_class = BlacklistRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[ROLE_CLAIM] = user.role
+        return token
+
+    @classmethod
+    def tokens_for(cls, user):
+        """The login response for an already authenticated user."""
+        refresh = cls.get_token(user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+        return {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh with rotation against the cache blacklist (users.tokens).
+
+    The user check uses the cached auth state instead of loading the
+    user, and new tokens carry the user's current role.
+    """
+    token_class = BlacklistRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        state = get_auth_state(refresh.payload.get(api_settings.USER_ID_CLAIM))
+        if state is None or not state[0]:
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'], 'no_active_account'
+            )
+        refresh[ROLE_CLAIM] = state[1]
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class LogoutSerializer(TokenBlacklistSerializer):
+    token_class = BlacklistRefreshToken
+
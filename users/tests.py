@@ -1,11 +1,22 @@
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from .models import CustomUser
 from .serializers import UserRegistrationSerializer
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from expenses.models import Expense
+import io
+import threading
+import time
 import uuid
+from datetime import timedelta
+
+from . import passwords, tokens
+from .tokens import BlacklistRefreshToken
 
 User = get_user_model()
 
@@ -116,4 +127,172 @@ class AuthViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('access', response.data)
 
-    
+
+class ClaimsAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='claims@example.com', name='Claims', password='TestPass123!'
+        )
+        resp = self.client.post(reverse('login'), {
+            'email': 'claims@example.com', 'password': 'TestPass123!'
+        })
+        self.access = resp.data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        self.url = reverse('expense-export')
+
+    def test_token_carries_role(self):
+        self.assertEqual(AccessToken(self.access)['role'], 'User')
+
+    def test_user_is_built_from_claims(self):
+        self.client.get(self.url)
+        # Only the export query itself; no CustomUser lookup.
+        with self.assertNumQueries(1):
+            resp = self.client.get(self.url)
+            b''.join(resp.streaming_content)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_deactivation_revokes_access(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_role_change_requires_new_token(self):
+        self.user.role = 'Admin'
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_writes_attach_to_token_user(self):
+        resp = self.client.post(reverse('expense-list'), {
+            'amount': '5.00', 'category': 'GROCERIES',
+            'date': timezone.now().date().isoformat(),
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Expense.objects.get().user_id, self.user.pk)
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000, PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE=0)
+class PasswordPoolTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='pool@example.com', name='Pool', password='TestPass123!'
+        )
+
+    def _login(self, password='TestPass123!', email='pool@example.com'):
+        return self.client.post(reverse('login'), {'email': email, 'password': password})
+
+    def test_login_verifies_in_pool(self):
+        self.assertEqual(self._login().status_code, status.HTTP_200_OK)
+        for resp in (self._login('wrong'), self._login(email='nobody@example.com')):
+            self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self._login().status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.post(reverse('login'), {}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_request_errors_are_json(self):
+        for name in ('login', 'user-signup'):
+            resp = self.client.post(reverse(name), 'email=x', content_type='text/plain')
+            self.assertEqual(resp.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+            self.assertIn('detail', resp.json())
+            resp = self.client.get(reverse(name))
+            self.assertEqual(resp.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+            self.assertEqual(resp.json(), {'detail': 'Method "GET" not allowed.'})
+            self.assertEqual(resp['Allow'], 'POST')
+
+    def test_signup_stores_pool_hash(self):
+        resp = self.client.post(reverse('user-signup'), {
+            'email': 'signup-pool@example.com', 'name': 'Signup', 'password': 'TestPass123!'
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(email='signup-pool@example.com')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(user.check_password('TestPass123!'))
+
+    def test_saturated_pool_sheds_with_429(self):
+        release = threading.Event()
+        busy = passwords.submit(release.wait)
+        try:
+            resp = self._login()
+            self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(resp['Retry-After'], '1')
+            resp = self.client.post(reverse('user-signup'), {
+                'email': 'shed@example.com', 'name': 'Shed', 'password': 'TestPass123!'
+            })
+            self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertFalse(User.objects.filter(email='shed@example.com').exists())
+        finally:
+            release.set()
+            busy.result()
+        self.assertEqual(self._login().status_code, status.HTTP_200_OK)
+
+    def test_hash_upgraded_lazily_on_login(self):
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=1500):
+            self.assertEqual(self._login('wrong').status_code, status.HTTP_401_UNAUTHORIZED)
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+            self.assertEqual(self._login().status_code, status.HTTP_200_OK)
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1500$'))
+            self.assertTrue(self.user.check_password('TestPass123!'))
+
+    @override_settings(PASSWORD_HASH_QUEUE=1)
+    def test_hasher_benchmark(self):
+        out = io.StringIO()
+        call_command('bench_hashers', iterations=1, burst=6, stdout=out)
+        self.assertIn('TunablePBKDF2PasswordHasher', out.getvalue())
+        self.assertRegex(out.getvalue(), r'burst of 6, served \d+, shed \d+')
+
+
+class RefreshBlacklistTests(APITestCase):
+    def setUp(self):
+        User.objects.create_user(email='rotate@example.com', name='Rotate', password='TestPass123!')
+        resp = self.client.post(reverse('login'), {
+            'email': 'rotate@example.com', 'password': 'TestPass123!'
+        })
+        self.refresh = resp.data['refresh']
+
+    def _refresh(self, token):
+        return self.client.post(reverse('refresh'), {'refresh': token})
+
+    def test_rotated_token_cannot_be_reused(self):
+        resp = self._refresh(self.refresh)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        rotated = resp.data['refresh']
+        self.assertNotEqual(rotated, self.refresh)
+        self.assertEqual(self._refresh(self.refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self._refresh(rotated).status_code, status.HTTP_200_OK)
+
+    def test_refresh_is_query_free_with_cached_auth_state(self):
+        rotated = self._refresh(self.refresh).data['refresh']
+        with self.assertNumQueries(0):
+            self.assertEqual(self._refresh(rotated).status_code, status.HTTP_200_OK)
+
+    def test_refresh_tracks_deactivation_and_role(self):
+        user = User.objects.get(email='rotate@example.com')
+        user.role = 'Admin'
+        user.save()
+        resp = self._refresh(self.refresh)
+        self.assertEqual(AccessToken(resp.data['access'])['role'], 'Admin')
+        user.is_active = False
+        user.save()
+        self.assertEqual(self._refresh(resp.data['refresh']).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_revokes_refresh_token(self):
+        resp = self.client.post(reverse('logout'), {'refresh': self.refresh})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._refresh(self.refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_entries_expire_with_the_token(self):
+        token = BlacklistRefreshToken(self.refresh)
+        lifetime = tokens.remaining_lifetime(token)
+        self.assertAlmostEqual(lifetime, BlacklistRefreshToken.lifetime.total_seconds(), delta=5)
+        self.assertTrue(tokens.revoke(token))
+        self.assertFalse(tokens.revoke(token))
+
+        short = BlacklistRefreshToken()
+        short.set_exp(lifetime=timedelta(seconds=1))
+        self.assertTrue(tokens.revoke(short))
+        time.sleep(2.1)
+        self.assertFalse(tokens.is_revoked(short))
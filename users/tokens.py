@@ -0,0 +1,63 @@
+"""
+Refresh-token blacklist kept in a cache instead of database tables.
+
+Revoking a refresh token stores its jti under the 'tokens' cache alias
+(Redis in production, an in-process cache otherwise) with a timeout equal
+to the token's remaining lifetime. An entry is only needed while the
+token could still verify, so it expires with the token and nothing has to
+prune it. Checks and revocations are one cache operation each, and
+revocation uses add() so two concurrent rotations of the same token
+cannot both succeed.
+"""
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+
+BLACKLIST_CACHE = 'tokens'
+
+
+def _key(jti):
+    return f'users:revoked-jti:{jti}'
+
+
+def remaining_lifetime(token):
+    """
+    Whole seconds until ``token`` expires, at least 1.
+    """
+    expires = datetime_from_epoch(token['exp'])
+    return max(int((expires - aware_utcnow()).total_seconds()) + 1, 1)
+
+
+def revoke(token):
+    """
+    Blacklist ``token``; False if it already was.
+    """
+    return caches[BLACKLIST_CACHE].add(
+        _key(token[api_settings.JTI_CLAIM]), True, remaining_lifetime(token)
+    )
+
+
+def is_revoked(token):
+    return caches[BLACKLIST_CACHE].get(_key(token[api_settings.JTI_CLAIM])) is not None
+
+
+class BlacklistRefreshToken(RefreshToken):
+    """
+    A RefreshToken checked against, and revoked into, the cache blacklist.
+    """
+
+    def verify(self):
+        super().verify()
+        if is_revoked(self):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        if not revoke(self):
+            raise TokenError(_('Token is blacklisted'))
+
+    def outstand(self):
+        # The cache blacklist needs no record of issued tokens.
+        return None
@@ -1,11 +1,10 @@
 from django.urls import path
-from .views import (
-    UserSignupView,
-)
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .views import login, signup
+from rest_framework_simplejwt.views import TokenBlacklistView, TokenRefreshView
 
 urlpatterns = [
-    path('auth/signup/', UserSignupView.as_view(), name='user-signup'),
-    path('auth/login/', TokenObtainPairView.as_view(), name='login'),
+    path('auth/signup/', signup, name='user-signup'),
+    path('auth/login/', login, name='login'),
     path('auth/refresh/', TokenRefreshView.as_view(), name='refresh'),
-]
\ No newline at end of file
+    path('auth/logout/', TokenBlacklistView.as_view(), name='logout'),
+]
@@ -1,12 +1,88 @@
-from rest_framework.views import APIView
-from rest_framework.response import Response
+"""
+Signup and login are async views: the password hash they need runs in
+the bounded pool of users.passwords, and a saturated pool sheds the
+request with 429 rather than queueing it behind every other login.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
-from .serializers import UserRegistrationSerializer
-
-class UserSignupView(APIView):
-    def post(self, request):
-        serializer = UserRegistrationSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response({"message": "User created successfully"}, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+from rest_framework.exceptions import APIException, MethodNotAllowed
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from . import passwords
+from .serializers import CustomTokenObtainPairSerializer, LoginSerializer, UserRegistrationSerializer
+
+RETRY_AFTER_SECONDS = 1
+
+
+def api_response(data, status=status.HTTP_200_OK, headers=None):
+    """
+    A rendered DRF Response, so clients and tests see the same body and
+    ``.data`` as from an APIView.
+    """
+    response = Response(data, status=status, headers=headers)
+    response.accepted_renderer = JSONRenderer()
+    response.accepted_media_type = 'application/json'
+    response.renderer_context = {}
+    return response.render()
+
+
+def password_view(view):
+    """
+    Parse the POSTed body like an APIView and shed load with 429 while
+    the hash pool is full.
+    """
+    @csrf_exempt
+    @wraps(view)
+    async def wrapper(request):
+        drf_request = Request(
+            request, parsers=[JSONParser(), FormParser(), MultiPartParser()]
+        )
+        try:
+            if request.method != 'POST':
+                raise MethodNotAllowed(request.method)
+            return await view(drf_request)
+        except MethodNotAllowed as exc:
+            return api_response(
+                {'detail': exc.detail}, status=exc.status_code, headers={'Allow': 'POST'}
+            )
+        except APIException as exc:
+            # Parse and media-type errors, answered as an APIView would.
+            return api_response({'detail': exc.detail}, status=exc.status_code)
+        except passwords.HashingOverloaded:
+            return api_response(
+                {'detail': 'Too many sign-ins in progress; retry shortly.'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(RETRY_AFTER_SECONDS)},
+            )
+    return wrapper
+
+
+@password_view
+async def signup(request):
+    serializer = UserRegistrationSerializer(data=request.data)
+    if not await sync_to_async(serializer.is_valid)():
+        return api_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    password_hash = await passwords.amake_password(serializer.validated_data['password'])
+    await sync_to_async(serializer.save)(password_hash=password_hash)
+    return api_response({"message": "User created successfully"}, status=status.HTTP_201_CREATED)
+
+
+@password_view
+async def login(request):
+    serializer = LoginSerializer(data=request.data)
+    if not serializer.is_valid():
+        return api_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    user = await passwords.aauthenticate(**serializer.validated_data)
+    if user is None:
+        return api_response(
+            {'detail': 'No active account found with the given credentials'},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    tokens = await sync_to_async(CustomTokenObtainPairSerializer.tokens_for)(user)
+    return api_response(tokens)